@@ -80,7 +80,8 @@ class Chat:
         self.llmClient = create_llm_provider(
             provider_type=self.config["llm_provider"],
             api_key=self.config["api_key"] if self.config["llm_api_key"] == '' else self.config["llm_api_key"],
-            endpoint=self.config["llm_endpoint"]
+            endpoint=self.config["llm_endpoint"],
+            enable_cache=True
         )
         log("debug", f"LLM provider initialized: {self.llmClient.get_provider_name()}")
         
@@ -401,6 +402,9 @@ class Chat:
         # Teardown TTS
         self.tts.quit()
 
+        # Release the LLM provider's background threads and connections
+        self.llmClient.close()
+
         # Execute plugin chat stop hooks
         self.plugin_manager.on_chat_stop(self.plugin_helper)
 
@@ -183,6 +183,11 @@ class Assistant:
                 if self.config["llm_model_name"] in ['gpt-5', 'gpt-5-mini', 'gpt-5-nano']:
                     llm_params["verbosity"] = "low"
                     llm_params["reasoning_effort"] = "minimal"
+
+                if not tool_list and self.llmClient.supports_streaming():
+                    # Without tools the reply is plain text, so it can be spoken while it streams in
+                    self.stream_reply(prompt, llm_params, reasons, start_time)
+                    return
                     
                 try:
                     response = self.llmClient.chat_completion_with_raw_response(
@@ -195,16 +200,7 @@ class Assistant:
                     end_time = time()
                     log('debug', 'Response time LLM', end_time - start_time)
                 except APIStatusError as e:
-                    log("debug", "LLM error request:", e.request.method, e.request.url, e.request.headers, e.request.read().decode('utf-8', errors='replace'))
-                    log("debug", "LLM error response:", e.response.status_code, e.response.headers, e.response.read().decode('utf-8', errors='replace'))
-                    
-                    try:
-                        error: dict = e.body[0] if hasattr(e, 'body') and e.body and isinstance(e.body, list) else e.body # pyright: ignore[reportAssignmentType]
-                        message = error.get('error', {}).get('message', e.body if e.body else 'Unknown error')
-                    except:
-                        message = e.message
-                    
-                    show_chat_message('error', f'LLM {e.response.reason_phrase}:', message)
+                    self.show_llm_error(e)
                     return
                 
                 completion = response.parse()
@@ -261,6 +257,55 @@ class Assistant:
         finally:
             self.is_replying = False
 
+    def show_llm_error(self, e: APIStatusError):
+        log("debug", "LLM error request:", e.request.method, e.request.url, e.request.headers, e.request.read().decode('utf-8', errors='replace'))
+        log("debug", "LLM error response:", e.response.status_code, e.response.headers, e.response.read().decode('utf-8', errors='replace'))
+        
+        try:
+            error: dict = e.body[0] if hasattr(e, 'body') and e.body and isinstance(e.body, list) else e.body # pyright: ignore[reportAssignmentType]
+            message = error.get('error', {}).get('message', e.body if e.body else 'Unknown error')
+        except:
+            message = e.message
+        
+        show_chat_message('error', f'LLM {e.response.reason_phrase}:', message)
+
+    def stream_reply(self, prompt: list[dict[str, Any]], llm_params: dict[str, str], reasons: list[str], start_time: float):
+        """Stream a reply without tool calls, speaking each sentence as soon as it is complete"""
+        try:
+            stream = self.llmClient.chat_completion_stream(
+                model=self.config["llm_model_name"],
+                messages=prompt,
+                temperature=self.config["llm_temperature"],
+                **llm_params,
+            )
+        except APIStatusError as e:
+            self.show_llm_error(e)
+            return
+
+        first_delta = True
+
+        def deltas():
+            nonlocal first_delta
+            for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                if first_delta:
+                    log('debug', 'Response time LLM (first token)', time() - start_time)
+                    first_delta = False
+                yield chunk.choices[0].delta.content
+
+        response_text = self.tts.say_stream(deltas())
+        log('debug', 'Response time LLM', time() - start_time)
+        if not response_text.strip():
+            log("debug", "LLM stream without text")
+            show_chat_message("covas", "...")
+            return
+
+        self.event_manager.add_conversation_event('assistant', response_text)
+        self.copilot.output_covas(response_text, reasons)
+        self.tts.wait_for_completion()
+        self.event_manager.add_assistant_complete_event()
+
     def should_reply(self, states:dict[str, Any]):
         character = self.config['characters'][self.config['active_character_index']]
         if len(self.pending) == 0:
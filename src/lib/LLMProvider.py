@@ -13,10 +13,35 @@ Design Goals (from NEXUS vision):
 - Graceful fallback between providers
 """
 
+import asyncio
+import atexit
+import hashlib
+import json
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Literal
-from openai.types.chat import ChatCompletion, ChatCompletionMessageToolCall
-from openai import OpenAI
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, Optional, Literal, TypeVar
+
+import httpx
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessageToolCall
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from .Logger import log
+
+
+# Shared connection pool for all providers, so keep-alive sockets (and their
+# TLS sessions) survive provider re-creation instead of re-handshaking per client.
+# DefaultHttpxClient keeps the SDK's own defaults (600s read timeout for slow local
+# models, follow_redirects), only the pool limits differ.
+_POOL_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60)
+_SHARED_HTTP = DefaultHttpxClient(limits=_POOL_LIMITS)
+atexit.register(_SHARED_HTTP.close)
+
+_T = TypeVar('_T')
+
+# GPT-5 specific params that local OpenAI-compatible servers reject
+_UNSUPPORTED_KWARGS = frozenset({'verbosity', 'reasoning_effort'})
 
 
 class LLMProvider(ABC):
@@ -81,6 +106,26 @@ class LLMProvider(ABC):
         """
         pass
 
+    @abstractmethod
+    def chat_completion_stream(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float = 1.0,
+        tools: Optional[list[dict[str, Any]]] = None,
+        **kwargs
+    ) -> Iterator[ChatCompletionChunk]:
+        """
+        Create a streaming chat completion.
+
+        Yields delta chunks as they arrive so TTS can start speaking on the
+        first complete sentence instead of waiting for the full response.
+
+        Returns:
+            Iterator of ChatCompletionChunk objects compatible with OpenAI format
+        """
+        pass
+
     @abstractmethod
     def supports_streaming(self) -> bool:
         """Whether this provider supports streaming responses"""
@@ -96,25 +141,70 @@ class LLMProvider(ABC):
         """Return the provider name for logging/debugging"""
         pass
 
+    def close(self) -> None:
+        """Release threads and connections owned by this provider (the shared pool stays open)"""
+        pass
+
+    def _start_prewarm(self) -> None:
+        """Warm up the endpoint connection in the background"""
+        threading.Thread(target=self._prewarm, daemon=True).start()
 
-class OpenAIProvider(LLMProvider):
-    """OpenAI API provider (existing implementation)"""
+    def _prewarm(self) -> None:
+        """
+        Open a keep-alive connection to the endpoint before the first real request.
 
-    def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1"):
+        Lists models (``/models``) with a short timeout so the TCP+TLS handshake
+        happens at startup instead of on the first chat completion. Any error
+        (offline server, auth failure) is ignored - the connection is what matters.
         """
-        Initialize OpenAI provider.
+        try:
+            self.get_openai_client().with_options(timeout=5.0, max_retries=0).models.list()
+        except Exception:
+            pass
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Provider for any server that speaks the OpenAI chat completions API.
+
+    OpenAI itself, OpenRouter and Google AI Studio as well as local servers
+    (Ollama, LM Studio, text-generation-webui, vLLM) only differ in endpoint,
+    default API key and which request parameters they reject, so one class
+    parameterized by those values serves all of them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        api_key: str,
+        unsupported_kwargs: frozenset[str] = frozenset()
+    ):
+        """
+        Initialize OpenAI-compatible provider.
 
         Args:
-            api_key: OpenAI API key
-            base_url: API endpoint (default: official OpenAI API)
+            name: Display name for logging/debugging (e.g., "Ollama")
+            base_url: API endpoint
+            api_key: API key (local servers accept any dummy value, but the OpenAI client expects one)
+            unsupported_kwargs: Request parameters the server rejects, dropped before sending
         """
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.name = name
+        self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=_SHARED_HTTP)
         self.base_url = base_url
+        self.unsupported_kwargs = unsupported_kwargs
+        self._start_prewarm()
 
     def get_openai_client(self) -> OpenAI:
         """Return the OpenAI client for backward compatibility"""
         return self.client
 
+    def _filter_kwargs(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Drop parameters this server doesn't support"""
+        if self.unsupported_kwargs.isdisjoint(kwargs):
+            return kwargs
+        return {k: v for k, v in kwargs.items() if k not in self.unsupported_kwargs}
+
     def chat_completion(
         self,
         model: str,
@@ -123,13 +213,13 @@ class OpenAIProvider(LLMProvider):
         tools: Optional[list[dict[str, Any]]] = None,
         **kwargs
     ) -> ChatCompletion:
-        """Create chat completion using OpenAI API"""
+        """Create chat completion using the OpenAI-compatible API"""
         return self.client.chat.completions.create(
             model=model,
             messages=messages,  # type: ignore
             temperature=temperature,
             tools=tools,  # type: ignore
-            **kwargs
+            **self._filter_kwargs(kwargs)
         )
 
     def chat_completion_with_raw_response(
@@ -146,146 +236,147 @@ class OpenAIProvider(LLMProvider):
             messages=messages,  # type: ignore
             temperature=temperature,
             tools=tools,  # type: ignore
-            **kwargs
-        )
-
-    def supports_streaming(self) -> bool:
-        return True
-
-    def supports_tools(self) -> bool:
-        return True
-
-    def get_provider_name(self) -> str:
-        return f"OpenAI ({self.base_url})"
-
-
-class OllamaProvider(LLMProvider):
-    """
-    Ollama local LLM provider
-
-    Ollama provides OpenAI-compatible API at http://localhost:11434
-    Supports models like llama3.1:8b, mistral:7b, etc.
-
-    Key features:
-    - Local inference (no API costs, offline capable)
-    - OpenAI-compatible API (easy integration)
-    - Function calling support (Llama 3.1+, Mistral, etc.)
-    - Streaming support
-
-    Limitations:
-    - Slower than cloud APIs (depends on hardware)
-    - Requires model downloaded locally (~4-8GB per model)
-    - Function calling quality varies by model
-    """
-
-    def __init__(self, base_url: str = "http://localhost:11434/v1", api_key: str = "ollama"):
-        """
-        Initialize Ollama provider.
-
-        Args:
-            base_url: Ollama API endpoint (default: http://localhost:11434/v1)
-            api_key: Dummy API key (Ollama doesn't require auth, but OpenAI client expects one)
-        """
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
-        self.base_url = base_url
-
-    def get_openai_client(self) -> OpenAI:
-        """Return the OpenAI client for backward compatibility"""
-        return self.client
-
-    def chat_completion(
-        self,
-        model: str,
-        messages: list[dict[str, Any]],
-        temperature: float = 1.0,
-        tools: Optional[list[dict[str, Any]]] = None,
-        **kwargs
-    ) -> ChatCompletion:
-        """
-        Create chat completion using Ollama API.
-
-        Ollama uses OpenAI-compatible format, so we can use the same client.
-        Tool/function calling works with models that support it (Llama 3.1+, Mistral, etc.)
-        """
-        # Remove kwargs that Ollama doesn't support
-        # GPT-5 specific params
-        filtered_kwargs = {k: v for k, v in kwargs.items()
-                          if k not in ['verbosity', 'reasoning_effort']}
-
-        return self.client.chat.completions.create(
-            model=model,
-            messages=messages,  # type: ignore
-            temperature=temperature,
-            tools=tools,  # type: ignore
-            **filtered_kwargs
+            **self._filter_kwargs(kwargs)
         )
 
-    def chat_completion_with_raw_response(
+    def chat_completion_stream(
         self,
         model: str,
         messages: list[dict[str, Any]],
         temperature: float = 1.0,
         tools: Optional[list[dict[str, Any]]] = None,
         **kwargs
-    ) -> Any:
-        """Create chat completion with raw response object"""
-        # Remove kwargs that Ollama doesn't support
-        filtered_kwargs = {k: v for k, v in kwargs.items()
-                          if k not in ['verbosity', 'reasoning_effort']}
-
-        return self.client.chat.completions.with_raw_response.create(  # type: ignore
+    ) -> Iterator[ChatCompletionChunk]:
+        """Stream chat completion chunks from the API"""
+        yield from self.client.chat.completions.create(
             model=model,
             messages=messages,  # type: ignore
             temperature=temperature,
             tools=tools,  # type: ignore
-            **filtered_kwargs
+            stream=True,
+            **self._filter_kwargs(kwargs)
         )
 
     def supports_streaming(self) -> bool:
         return True
 
     def supports_tools(self) -> bool:
-        # Ollama supports tools with compatible models
-        # Llama 3.1+, Mistral 7B+, etc. have function calling
+        # Local servers support tools with compatible models (Llama 3.1+, Mistral, etc.)
         return True
 
     def get_provider_name(self) -> str:
-        return f"Ollama ({self.base_url})"
+        return f"{self.name} ({self.base_url})"
 
 
-class LMStudioProvider(LLMProvider):
-    """
-    LM Studio local LLM provider
+class OpenAIProvider(OpenAICompatibleProvider):
+    """OpenAI API provider (kept for backward compatibility)"""
+
+    def __init__(self, api_key: str, base_url: str = "https://api.openai.com/v1"):
+        super().__init__("OpenAI", base_url, api_key)
 
-    LM Studio is a desktop app for running LLMs locally with a GUI.
-    Provides OpenAI-compatible API at http://localhost:1234/v1
 
-    Key features:
-    - User-friendly GUI for model management
-    - Automatic GPU acceleration
-    - Model library with one-click downloads
-    - Built-in model quantization options
+class BatchingProvider(LLMProvider):
+    """
+    Micro-batcher in front of an OpenAI-compatible provider.
 
-    Requirements:
-    - LM Studio installed (lmstudio.ai)
-    - Model loaded in LM Studio
-    - Local server running
+    Chat completions that arrive within ``batch_window_ms`` of each other are
+    sent together as one burst from an async client, so servers with
+    continuous batching (vLLM in particular) can schedule them as a batch
+    instead of handling them one by one. The sync interface is unchanged:
+    each call blocks until its own response arrives.
     """
 
-    def __init__(self, base_url: str = "http://localhost:1234/v1", api_key: str = "lm-studio"):
+    def __init__(self, provider: OpenAICompatibleProvider, batch_window_ms: float = 10, max_batch: int = 16):
         """
-        Initialize LM Studio provider.
+        Initialize batching provider.
 
         Args:
-            base_url: LM Studio API endpoint (default: http://localhost:1234/v1)
-            api_key: Dummy API key (LM Studio doesn't require auth)
+            provider: Provider whose endpoint receives the batches
+            batch_window_ms: How long to wait for more requests after the first one
+            max_batch: Maximum number of requests sent in one burst
         """
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
-        self.base_url = base_url
+        self.provider = provider
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._tasks: set[asyncio.Task] = set()
+        self._thread = threading.Thread(target=self._run_loop, name='LLMBatcher', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self) -> None:
+        """Own the event loop the async client and request queue live on"""
+        asyncio.set_event_loop(self._loop)
+        client = self.provider.get_openai_client()
+        # An async pool is bound to the loop it is used on, so it can't be _SHARED_HTTP;
+        # it gets the same limits and keeps the sync client's timeout and retries
+        self._http = DefaultAsyncHttpxClient(limits=_POOL_LIMITS)
+        self._client = AsyncOpenAI(api_key=client.api_key, base_url=client.base_url, timeout=client.timeout,
+                                   max_retries=client.max_retries, http_client=self._http)
+        self._queue: asyncio.Queue[tuple[dict[str, Any], asyncio.Future]] = asyncio.Queue()
+        self._loop.create_task(self._collect())
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _collect(self) -> None:
+        """Group queued requests into batches and fire each batch without waiting for the last one"""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = self._loop.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[dict[str, Any], asyncio.Future]]) -> None:
+        """Send a batch concurrently and hand each caller its own result"""
+        results = await asyncio.gather(
+            *[self._client.chat.completions.create(**request) for request, _ in batch],
+            return_exceptions=True
+        )
+        for (_, future), result in zip(batch, results):
+            if future.cancelled():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _submit(self, request: dict[str, Any]) -> ChatCompletion:
+        future = self._loop.create_future()
+        self._queue.put_nowait((request, future))
+        return await future
+
+    async def _shutdown(self) -> None:
+        """Cancel the collector and every request in flight, then close the connection pool"""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()  # waiting callers get CancelledError
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._http.aclose()
+
+    def close(self) -> None:
+        """Stop the batching loop and its thread, and close the async connection pool"""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self.provider.close()
 
     def get_openai_client(self) -> OpenAI:
-        """Return the OpenAI client for backward compatibility"""
-        return self.client
+        return self.provider.get_openai_client()
 
     def chat_completion(
         self,
@@ -295,18 +386,15 @@ class LMStudioProvider(LLMProvider):
         tools: Optional[list[dict[str, Any]]] = None,
         **kwargs
     ) -> ChatCompletion:
-        """Create chat completion using LM Studio API"""
-        # Filter unsupported kwargs
-        filtered_kwargs = {k: v for k, v in kwargs.items()
-                          if k not in ['verbosity', 'reasoning_effort']}
-
-        return self.client.chat.completions.create(
-            model=model,
-            messages=messages,  # type: ignore
-            temperature=temperature,
-            tools=tools,  # type: ignore
-            **filtered_kwargs
-        )
+        """Queue the request for the next batch and wait for its response"""
+        request = {
+            'model': model,
+            'messages': messages,
+            'temperature': temperature,
+            'tools': tools,
+            **self.provider._filter_kwargs(kwargs)
+        }
+        return asyncio.run_coroutine_threadsafe(self._submit(request), self._loop).result()
 
     def chat_completion_with_raw_response(
         self,
@@ -316,64 +404,86 @@ class LMStudioProvider(LLMProvider):
         tools: Optional[list[dict[str, Any]]] = None,
         **kwargs
     ) -> Any:
-        """Create chat completion with raw response object"""
-        filtered_kwargs = {k: v for k, v in kwargs.items()
-                          if k not in ['verbosity', 'reasoning_effort']}
+        """Raw responses are forwarded unbatched"""
+        return self.provider.chat_completion_with_raw_response(model, messages, temperature, tools, **kwargs)
 
-        return self.client.chat.completions.with_raw_response.create(  # type: ignore
-            model=model,
-            messages=messages,  # type: ignore
-            temperature=temperature,
-            tools=tools,  # type: ignore
-            **filtered_kwargs
-        )
+    def chat_completion_stream(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float = 1.0,
+        tools: Optional[list[dict[str, Any]]] = None,
+        **kwargs
+    ) -> Iterator[ChatCompletionChunk]:
+        """Streams are forwarded unbatched"""
+        return self.provider.chat_completion_stream(model, messages, temperature, tools, **kwargs)
 
     def supports_streaming(self) -> bool:
-        return True
+        return self.provider.supports_streaming()
 
     def supports_tools(self) -> bool:
-        # LM Studio supports tools with compatible models
-        return True
+        return self.provider.supports_tools()
 
     def get_provider_name(self) -> str:
-        return f"LM Studio ({self.base_url})"
+        return f"{self.provider.get_provider_name()} (batched)"
 
 
-class TextGenWebuiProvider(LLMProvider):
+class PoolProvider(LLMProvider):
     """
-    text-generation-webui (oobabooga) provider
+    Dispatches requests across several providers.
 
-    Popular open-source web UI for running LLMs locally.
-    Provides OpenAI-compatible API via extensions.
-
-    Key features:
-    - Extensive model format support (GGUF, GPTQ, AWQ, etc.)
-    - Advanced generation parameters
-    - LoRA adapter support
-    - Character/instruction templates
-
-    Requirements:
-    - text-generation-webui installed
-    - openai extension enabled
-    - Server running on port 5000 (default)
-
-    Setup: https://github.com/oobabooga/text-generation-webui
+    Each request goes to the backend with the fewest requests in flight, so
+    multiple keys or servers add up their throughput. Rate limits (HTTP 429),
+    server errors (5xx) and connection failures fall through to the next
+    backend; any other error is raised as-is.
     """
 
-    def __init__(self, base_url: str = "http://localhost:5000/v1", api_key: str = "text-gen-webui"):
+    def __init__(self, providers: list[LLMProvider]):
         """
-        Initialize text-generation-webui provider.
+        Initialize provider pool.
 
         Args:
-            base_url: API endpoint (default: http://localhost:5000/v1)
-            api_key: Dummy API key
+            providers: Backends in order of preference (ties go to the earlier one)
         """
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
-        self.base_url = base_url
+        if not providers:
+            raise ValueError("PoolProvider needs at least one provider")
+        self._p = providers
+        self._inflight = [0] * len(providers)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(error, APIConnectionError)
+
+    def _acquire(self, exclude: set[int]) -> int:
+        """Reserve the least-loaded backend not tried yet"""
+        with self._lock:
+            i = min((j for j in range(len(self._p)) if j not in exclude), key=lambda j: self._inflight[j])
+            self._inflight[i] += 1
+        return i
+
+    def _release(self, i: int) -> None:
+        with self._lock:
+            self._inflight[i] -= 1
+
+    def _dispatch(self, call: Callable[[LLMProvider], _T]) -> _T:
+        tried: set[int] = set()
+        while True:
+            i = self._acquire(tried)
+            try:
+                return call(self._p[i])
+            except Exception as e:
+                tried.add(i)
+                if not self._is_retryable(e) or len(tried) == len(self._p):
+                    raise
+                log('warn', f'{self._p[i].get_provider_name()} failed ({e}), retrying on next backend')
+            finally:
+                self._release(i)
 
     def get_openai_client(self) -> OpenAI:
-        """Return the OpenAI client for backward compatibility"""
-        return self.client
+        return self._p[0].get_openai_client()
 
     def chat_completion(
         self,
@@ -383,17 +493,8 @@ class TextGenWebuiProvider(LLMProvider):
         tools: Optional[list[dict[str, Any]]] = None,
         **kwargs
     ) -> ChatCompletion:
-        """Create chat completion using text-gen-webui API"""
-        filtered_kwargs = {k: v for k, v in kwargs.items()
-                          if k not in ['verbosity', 'reasoning_effort']}
-
-        return self.client.chat.completions.create(
-            model=model,
-            messages=messages,  # type: ignore
-            temperature=temperature,
-            tools=tools,  # type: ignore
-            **filtered_kwargs
-        )
+        """Create chat completion on the least-loaded backend"""
+        return self._dispatch(lambda p: p.chat_completion(model, messages, temperature, tools, **kwargs))
 
     def chat_completion_with_raw_response(
         self,
@@ -403,65 +504,103 @@ class TextGenWebuiProvider(LLMProvider):
         tools: Optional[list[dict[str, Any]]] = None,
         **kwargs
     ) -> Any:
-        """Create chat completion with raw response object"""
-        filtered_kwargs = {k: v for k, v in kwargs.items()
-                          if k not in ['verbosity', 'reasoning_effort']}
+        """Create chat completion with raw response object on the least-loaded backend"""
+        return self._dispatch(lambda p: p.chat_completion_with_raw_response(model, messages, temperature, tools, **kwargs))
 
-        return self.client.chat.completions.with_raw_response.create(  # type: ignore
-            model=model,
-            messages=messages,  # type: ignore
-            temperature=temperature,
-            tools=tools,  # type: ignore
-            **filtered_kwargs
-        )
+    def chat_completion_stream(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float = 1.0,
+        tools: Optional[list[dict[str, Any]]] = None,
+        **kwargs
+    ) -> Iterator[ChatCompletionChunk]:
+        """Stream from the least-loaded backend (fails over only before the first chunk)"""
+        tried: set[int] = set()
+        while True:
+            i = self._acquire(tried)
+            try:
+                stream = self._p[i].chat_completion_stream(model, messages, temperature, tools, **kwargs)
+                try:
+                    first = next(stream)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    tried.add(i)
+                    if not self._is_retryable(e) or len(tried) == len(self._p):
+                        raise
+                    log('warn', f'{self._p[i].get_provider_name()} failed ({e}), retrying on next backend')
+                    continue
+                yield first
+                yield from stream
+                return
+            finally:
+                self._release(i)
 
     def supports_streaming(self) -> bool:
-        return True
+        return all(p.supports_streaming() for p in self._p)
 
     def supports_tools(self) -> bool:
-        # Tool support depends on model and configuration
-        # Some models with instruction tuning can handle it
-        return True
+        return all(p.supports_tools() for p in self._p)
 
     def get_provider_name(self) -> str:
-        return f"text-generation-webui ({self.base_url})"
-
+        return f"Pool [{', '.join(p.get_provider_name() for p in self._p)}]"
 
-class VLLMProvider(LLMProvider):
-    """
-    vLLM (Virtual LLM) provider
-
-    High-performance inference engine optimized for throughput.
-    Provides OpenAI-compatible API.
+    def close(self) -> None:
+        for p in self._p:
+            p.close()
 
-    Key features:
-    - Fastest inference speed (PagedAttention)
-    - Excellent for production deployments
-    - Automatic batching and continuous batching
-    - Multi-GPU support
 
-    Requirements:
-    - vLLM installed and running
-    - CUDA-compatible GPU
-    - Server started with --api-key or no auth
+class CachedLLMProvider(LLMProvider):
+    """
+    In-process LRU+TTL response cache in front of another provider.
 
-    Setup: https://docs.vllm.ai/
+    Identical deterministic requests (same model, messages, tools, params at
+    temperature 0) are answered from memory instead of a full round-trip.
+    Non-zero temperatures are never cached - the caller asked for variety.
     """
 
-    def __init__(self, base_url: str = "http://localhost:8000/v1", api_key: str = "vllm"):
+    def __init__(self, provider: LLMProvider, max_size: int = 1000, ttl_seconds: float = 3600):
         """
-        Initialize vLLM provider.
+        Initialize cached provider.
 
         Args:
-            base_url: vLLM API endpoint (default: http://localhost:8000/v1)
-            api_key: API key if vLLM server requires it
+            provider: Provider that serves cache misses
+            max_size: Maximum number of cached completions
+            ttl_seconds: How long a cached completion stays valid
         """
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
-        self.base_url = base_url
+        self.provider = provider
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._cache: OrderedDict[str, tuple[float, ChatCompletion]] = OrderedDict()  # key -> (expires_at, completion)
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0
+        }
+
+    def _generate_cache_key(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float,
+        tools: Optional[list[dict[str, Any]]],
+        kwargs: dict[str, Any]
+    ) -> str:
+        """Generate cache key from the full request"""
+        request = json.dumps({
+            'model': model,
+            'messages': messages,
+            'temperature': temperature,
+            'tools': tools,
+            'kwargs': kwargs
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(request.encode()).hexdigest()
 
     def get_openai_client(self) -> OpenAI:
-        """Return the OpenAI client for backward compatibility"""
-        return self.client
+        return self.provider.get_openai_client()
 
     def chat_completion(
         self,
@@ -471,17 +610,29 @@ class VLLMProvider(LLMProvider):
         tools: Optional[list[dict[str, Any]]] = None,
         **kwargs
     ) -> ChatCompletion:
-        """Create chat completion using vLLM API"""
-        filtered_kwargs = {k: v for k, v in kwargs.items()
-                          if k not in ['verbosity', 'reasoning_effort']}
+        """Return cached completion for deterministic requests, else forward"""
+        if temperature != 0:
+            return self.provider.chat_completion(model, messages, temperature, tools, **kwargs)
 
-        return self.client.chat.completions.create(
-            model=model,
-            messages=messages,  # type: ignore
-            temperature=temperature,
-            tools=tools,  # type: ignore
-            **filtered_kwargs
-        )
+        cache_key = self._generate_cache_key(model, messages, temperature, tools, kwargs)
+
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry and entry[0] > time.monotonic():
+                self._cache.move_to_end(cache_key)
+                self.stats['hits'] += 1
+                return entry[1].model_copy(deep=True)
+            self.stats['misses'] += 1
+
+        completion = self.provider.chat_completion(model, messages, temperature, tools, **kwargs)
+
+        with self._lock:
+            self._cache[cache_key] = (time.monotonic() + self.ttl_seconds, completion.model_copy(deep=True))
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return completion
 
     def chat_completion_with_raw_response(
         self,
@@ -491,33 +642,82 @@ class VLLMProvider(LLMProvider):
         tools: Optional[list[dict[str, Any]]] = None,
         **kwargs
     ) -> Any:
-        """Create chat completion with raw response object"""
-        filtered_kwargs = {k: v for k, v in kwargs.items()
-                          if k not in ['verbosity', 'reasoning_effort']}
+        """Raw responses carry per-request HTTP metadata, so they are never cached"""
+        return self.provider.chat_completion_with_raw_response(model, messages, temperature, tools, **kwargs)
 
-        return self.client.chat.completions.with_raw_response.create(  # type: ignore
-            model=model,
-            messages=messages,  # type: ignore
-            temperature=temperature,
-            tools=tools,  # type: ignore
-            **filtered_kwargs
-        )
+    def chat_completion_stream(
+        self,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float = 1.0,
+        tools: Optional[list[dict[str, Any]]] = None,
+        **kwargs
+    ) -> Iterator[ChatCompletionChunk]:
+        """Streams are forwarded uncached"""
+        return self.provider.chat_completion_stream(model, messages, temperature, tools, **kwargs)
 
     def supports_streaming(self) -> bool:
-        return True
+        return self.provider.supports_streaming()
 
     def supports_tools(self) -> bool:
-        # vLLM supports tools with compatible models
-        return True
+        return self.provider.supports_tools()
 
     def get_provider_name(self) -> str:
-        return f"vLLM ({self.base_url})"
+        return f"{self.provider.get_provider_name()} (cached)"
+
+    def close(self) -> None:
+        self.provider.close()
+
+    def get_stats(self) -> dict:
+        """
+        Get cache performance statistics.
+
+        Returns:
+            Dict with hits, misses, hit_rate_percent, cached_items
+        """
+        total_requests = self.stats['hits'] + self.stats['misses']
+        hit_rate = (self.stats['hits'] / total_requests * 100) if total_requests > 0 else 0
+
+        return {
+            'hits': self.stats['hits'],
+            'misses': self.stats['misses'],
+            'hit_rate_percent': round(hit_rate, 1),
+            'cached_items': len(self._cache)
+        }
+
+    def clear_cache(self):
+        """Clear all cached completions"""
+        with self._lock:
+            self._cache.clear()
+            self.stats = {
+                'hits': 0,
+                'misses': 0
+            }
+
+
+# provider_type -> (name, default endpoint, default API key, unsupported kwargs)
+_REGISTRY: dict[str, tuple[str, str, str, frozenset[str]]] = {
+    'openai': ('OpenAI', "https://api.openai.com/v1", "", frozenset()),
+    # These all use OpenAI-compatible APIs, the endpoint comes from the config
+    'openrouter': ('OpenAI', "https://api.openai.com/v1", "", frozenset()),
+    'google-ai-studio': ('OpenAI', "https://api.openai.com/v1", "", frozenset()),
+    'custom': ('OpenAI', "https://api.openai.com/v1", "", frozenset()),
+    'local-ai-server': ('OpenAI', "https://api.openai.com/v1", "", frozenset()),
+    # Local inference servers (no auth, but the OpenAI client expects a key)
+    'ollama': ('Ollama', "http://localhost:11434/v1", "ollama", _UNSUPPORTED_KWARGS),
+    'lm-studio': ('LM Studio', "http://localhost:1234/v1", "lm-studio", _UNSUPPORTED_KWARGS),
+    'text-gen-webui': ('text-generation-webui', "http://localhost:5000/v1", "text-gen-webui", _UNSUPPORTED_KWARGS),
+    'vllm': ('vLLM', "http://localhost:8000/v1", "vllm", _UNSUPPORTED_KWARGS),
+}
 
 
 def create_llm_provider(
     provider_type: Literal['openai', 'ollama', 'lm-studio', 'text-gen-webui', 'vllm', 'openrouter', 'google-ai-studio', 'custom', 'local-ai-server'],
     api_key: str,
     endpoint: str = "",
+    enable_cache: bool = False,
+    enable_batching: bool = False,
+    endpoints: Optional[list[str]] = None,
 ) -> LLMProvider:
     """
     Factory function to create appropriate LLM provider.
@@ -526,6 +726,9 @@ def create_llm_provider(
         provider_type: Type of provider to create
         api_key: API key for the provider
         endpoint: Custom endpoint URL (if applicable)
+        enable_cache: Wrap the provider in a CachedLLMProvider
+        enable_batching: Coalesce concurrent requests with a BatchingProvider (useful for vLLM)
+        endpoints: Several endpoint URLs to spread requests over with a PoolProvider
 
     Returns:
         Configured LLMProvider instance
@@ -533,35 +736,18 @@ def create_llm_provider(
     Raises:
         ValueError: If provider_type is not supported
     """
-    if provider_type == 'ollama':
-        # Default to Ollama's standard endpoint
-        base_url = endpoint if endpoint else "http://localhost:11434/v1"
-        return OllamaProvider(base_url=base_url, api_key=api_key or "ollama")
-
-    elif provider_type == 'lm-studio':
-        # LM Studio default endpoint
-        base_url = endpoint if endpoint else "http://localhost:1234/v1"
-        return LMStudioProvider(base_url=base_url, api_key=api_key or "lm-studio")
-
-    elif provider_type == 'text-gen-webui':
-        # text-generation-webui (oobabooga) default endpoint
-        base_url = endpoint if endpoint else "http://localhost:5000/v1"
-        return TextGenWebuiProvider(base_url=base_url, api_key=api_key or "text-gen-webui")
-
-    elif provider_type == 'vllm':
-        # vLLM default endpoint
-        base_url = endpoint if endpoint else "http://localhost:8000/v1"
-        return VLLMProvider(base_url=base_url, api_key=api_key or "vllm")
-
-    elif provider_type == 'openai':
-        base_url = endpoint if endpoint else "https://api.openai.com/v1"
-        return OpenAIProvider(api_key=api_key, base_url=base_url)
-
-    elif provider_type in ['openrouter', 'google-ai-studio', 'custom', 'local-ai-server']:
-        # These all use OpenAI-compatible APIs, just different endpoints
-        # Use OpenAI provider with custom endpoint
-        base_url = endpoint if endpoint else "https://api.openai.com/v1"
-        return OpenAIProvider(api_key=api_key, base_url=base_url)
+    try:
+        name, default_url, default_api_key, unsupported_kwargs = _REGISTRY[provider_type]
+    except KeyError:
+        raise ValueError(f"Unsupported provider type: {provider_type}")
+
+    def make_provider(base_url: str) -> LLMProvider:
+        compatible = OpenAICompatibleProvider(name, base_url, api_key or default_api_key, unsupported_kwargs)
+        return BatchingProvider(compatible) if enable_batching else compatible
 
+    if endpoints and len(endpoints) > 1:
+        provider: LLMProvider = PoolProvider([make_provider(url) for url in endpoints])
     else:
-        raise ValueError(f"Unsupported provider type: {provider_type}")
+        provider = make_provider((endpoints[0] if endpoints else endpoint) or default_url)
+
+    return CachedLLMProvider(provider) if enable_cache else provider
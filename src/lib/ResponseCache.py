@@ -7,13 +7,108 @@ sub-100ms latency for frequently repeated phrases.
 Goal: 40% cache hit rate = 950ms saved per cached response
 """
 
+import atexit
+import functools
+import gzip
 import json
 import hashlib
+import itertools
+import mmap
+import os
+import queue
+import re
+import sqlite3
+import threading
 import time
+import weakref
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Callable, Optional, Dict, Tuple
+
+import numpy as np
+
 from .Logger import log
 
+# Phrases that are always cached (matched anywhere in the lowercased text)
+COMMON_PHRASES = (
+    'hardpoints deployed',
+    'setting speed',
+    'shields up',
+    'understood',
+    'cargo scoop',
+    'landing gear',
+    'frameshift',
+    'jump complete'
+)
+_COMMON_PHRASES_RE = re.compile('|'.join(map(re.escape, COMMON_PHRASES)))
+_COMMON_PHRASES_SET = frozenset(COMMON_PHRASES)  # exact matches skip the regex scan
+
+# Hit timestamps are written at most this often (seconds)
+LAST_USED_FLUSH_SECONDS = 5
+
+# metadata.json is rewritten at most this often (seconds), coalescing bursts of inserts
+METADATA_FLUSH_SECONDS = 0.25
+
+# Sentence embedding model and minimum cosine similarity for semantic lookups
+SEMANTIC_MODEL = 'all-MiniLM-L6-v2'
+SEMANTIC_THRESHOLD = 0.92
+
+# Responses with numbers are never matched semantically ("50 percent" ≈ "75 percent")
+_NUMERIC_RE = re.compile(
+    r'\d|\b(zero|one|two|three|four|five|six|seven|eight|nine|ten|hundred|thousand|percent)\b',
+    re.IGNORECASE
+)
+
+# Eviction picks the least used of this many least recently used entries,
+# so a hot phrase isn't dropped just because a burst of one-offs came after it
+EVICTION_SAMPLE = 16
+
+# Eviction frees space down to this fraction of max_size_mb, so the next inserts don't evict again
+EVICTION_TARGET = 0.8
+
+# Maximum cache writes waiting for the background writer; more are dropped
+WRITE_QUEUE_SIZE = 64
+
+# Per-entry columns of the SQLite metadata store (same names as the metadata dict fields)
+_ENTRY_COLUMNS = ('text', 'voice', 'speed', 'provider', 'hit_count', 'last_used', 'created', 'size', 'file_path')
+_UPSERT_ENTRY_SQL = (
+    f"INSERT OR REPLACE INTO entries (cache_key, {', '.join(_ENTRY_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(_ENTRY_COLUMNS) + 1))})"
+)
+
+
+class Stats:
+    """Cache counters (slots instead of a dict, they're updated on every lookup)"""
+
+    __slots__ = ('hits', 'misses', 'generations', 'total_saved_ms')
+
+    def __init__(self, hits: int = 0, misses: int = 0, generations: int = 0, total_saved_ms: int = 0):
+        self.hits = hits
+        self.misses = misses
+        self.generations = generations
+        self.total_saved_ms = total_saved_ms
+
+    def __getitem__(self, name: str) -> int:
+        """Dict-style read access, as stats used to be a dict"""
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Stats':
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+
+@functools.lru_cache(maxsize=4096, typed=True)  # typed: speed 1 and 1.0 format (and hash) differently
+def _cache_key(text: str, voice: str, speed: float, provider: str) -> str:
+    """Generate unique cache key for text + TTS settings (memoized, repeat phrases skip hashing)"""
+    key_string = f"{text}|{voice}|{speed}|{provider}"
+    return hashlib.blake2b(key_string.encode(), digest_size=16).hexdigest()
+
 
 class ResponseCache:
     """
@@ -26,44 +121,211 @@ class ResponseCache:
     4. LRU eviction when cache gets large
     """
 
-    def __init__(self, cache_dir: str = "cache/responses", max_size_mb: int = 100):
+    def __init__(self, cache_dir: str = "cache/responses", max_size_mb: int = 100, max_mapped_files: int = 64,
+                 enable_semantic: bool = False, compress: bool = False):
         """
         Initialize response cache.
 
         Args:
             cache_dir: Directory to store cached audio files
             max_size_mb: Maximum cache size in megabytes
+            max_mapped_files: How many hot audio files to keep memory-mapped (or decompressed in memory)
+            enable_semantic: Serve paraphrased responses from the most similar cached phrase
+                (requires sentence-transformers)
+            compress: Gzip new audio files on disk, so more phrases fit in max_size_mb
+                (hot phrases are kept decompressed instead of memory-mapped; not worth it for mp3/opus)
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._cache_dir_str = str(self.cache_dir) + os.sep  # hot paths build plain string paths
 
         self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.compress = compress
 
         # In-memory metadata
-        self.metadata: Dict[str, dict] = {}  # cache_key -> {hit_count, last_used, size, file_path}
-        self.hit_counts: Dict[str, int] = {}  # text -> hit_count (for learning)
+        self.metadata: OrderedDict[str, dict] = OrderedDict()  # cache_key -> {hit_count, last_used, size, file_path}, least recently used first
+        self.hit_counts: Counter[str] = Counter()  # text -> hit_count (for learning)
+        self._cache_size_bytes = 0  # running total of metadata sizes
+
+        # Per-entry metadata lives in SQLite, so each change is a single-row upsert
+        # instead of rewriting the whole metadata file
+        self._db = self._open_db()
+        self._dirty_keys: set[str] = set()  # entries with unsaved hit_count/last_used
+        self._hits_timer: Optional[threading.Timer] = None
+
+        # Memory-mapped hot audio files, so repeated hits skip open()+read()
+        self.max_mapped_files = max_mapped_files
+        self._mmaps: OrderedDict[str, mmap.mmap] = OrderedDict()  # cache_key -> mapping (LRU order)
+        # Compressed files can't be mapped, their hot phrases are kept decompressed instead
+        self._decompressed: OrderedDict[str, bytes] = OrderedDict()  # cache_key -> audio (LRU order)
+
+        # Disk writes happen on a background thread so cache_audio never blocks
+        # the TTS caller; audio waiting to be written is served from _pending
+        self._lock = threading.RLock()  # guards metadata, mappings, pending writes and the db
+        self._metadata_lock = threading.Lock()  # serializes metadata.json writes
+        self._pending: Dict[str, bytes | bytearray] = {}  # cache_key -> audio not yet on disk
+        self._metadata_dirty = False  # metadata.json is behind memory
+        self._flush_timer: Optional[threading.Timer] = None
+        # (None stops the writer, see close())
+        self._write_queue: queue.Queue[Optional[tuple[str, str, bytes | bytearray, str]]] = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._writer_loop, name='ResponseCacheWriter', daemon=True)
+        self._writer.start()
+        self._closed = False
+
+        # Warm-up thread started by warm_cache, stopped by close()
+        self._warm_thread: Optional[threading.Thread] = None
+        self._warm_stop = threading.Event()
+
+        # Semantic lookup: normalized embeddings of cached phrases (brute-force search, N is small)
+        self._encode: Optional[Callable[[str], np.ndarray]] = self._load_semantic_model() if enable_semantic else None
+        self._embeddings: Dict[str, np.ndarray] = {}  # cache_key -> embedding
 
         # Stats
-        self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'generations': 0,
-            'total_saved_ms': 0
-        }
+        self.stats = Stats()
 
         # Load existing cache metadata
         self._load_metadata()
+        _live_caches.add(self)
 
-    def _generate_cache_key(self, text: str, voice: str, speed: float, provider: str) -> str:
-        """Generate unique cache key for text + TTS settings"""
-        key_string = f"{text}|{voice}|{speed}|{provider}"
-        return hashlib.md5(key_string.encode()).hexdigest()
+        if self._encode:
+            threading.Thread(target=self._embed_entries, daemon=True).start()
 
-    def _get_cache_path(self, cache_key: str) -> Path:
+    def _load_semantic_model(self) -> Optional[Callable[[str], np.ndarray]]:
+        """Load the sentence embedding model, or None if it isn't installed"""
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            log('warning', 'Semantic response cache requires sentence-transformers, using exact matching only')
+            return None
+
+        model = SentenceTransformer(SEMANTIC_MODEL)
+        return lambda text: model.encode(text, normalize_embeddings=True)
+
+    def _embed_entries(self):
+        """Embed entries loaded from disk for semantic lookups"""
+        with self._lock:
+            entries = [(cache_key, meta['text']) for cache_key, meta in self.metadata.items()]
+
+        for cache_key, text in entries:
+            self._add_embedding(cache_key, text)
+
+    def _add_embedding(self, cache_key: str, text: str):
+        """Index a cached phrase for semantic lookups"""
+        if not self._encode or _NUMERIC_RE.search(text):
+            return
+
+        try:
+            embedding = self._encode(text)
+        except Exception as e:
+            log('error', f'Failed to embed cached phrase: {e}')
+            return
+
+        with self._lock:
+            if cache_key in self.metadata:
+                self._embeddings[cache_key] = embedding
+
+    def _find_similar(self, text: str, voice: str, speed: float, provider: str) -> Optional[str]:
+        """
+        Find the cache key of the most similar cached phrase with the same TTS settings.
+
+        Call without _lock held: the query is embedded outside the lock, so model
+        inference doesn't stall hits and the writer; only the scoring takes it.
+        """
+        if not self._encode or not self._embeddings or _NUMERIC_RE.search(text):
+            return None
+
+        try:
+            query = self._encode(text)
+        except Exception as e:
+            log('error', f'Failed to embed phrase: {e}')
+            return None
+
+        with self._lock:
+            candidates = [
+                cache_key for cache_key in self._embeddings
+                if (meta := self.metadata.get(cache_key))
+                and meta['voice'] == voice and meta['speed'] == speed and meta['provider'] == provider
+            ]
+            if not candidates:
+                return None
+
+            scores = np.stack([self._embeddings[cache_key] for cache_key in candidates]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < SEMANTIC_THRESHOLD:
+                return None
+
+            log('debug', f'Semantic cache match ({scores[best]:.2f}): "{text[:50]}..." -> "{self.metadata[candidates[best]]["text"][:50]}..."')
+            return candidates[best]
+
+    def _open_db(self) -> sqlite3.Connection:
+        """Open (and create if needed) the SQLite metadata store in WAL mode"""
+        db = sqlite3.connect(self.cache_dir / 'metadata.db', isolation_level=None, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        # WAL stays consistent without an fsync per commit; a crash can only lose the latest entries
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'cache_key TEXT PRIMARY KEY, text TEXT, voice TEXT, speed REAL, provider TEXT, '
+            'hit_count INTEGER, last_used REAL, created REAL, size INTEGER, file_path TEXT)'
+        )
+        return db
+
+    def _save_entry(self, cache_key: str):
+        """Persist a single metadata entry"""
+        meta = self.metadata[cache_key]
+        self._db.execute(_UPSERT_ENTRY_SQL, (cache_key, *(meta[column] for column in _ENTRY_COLUMNS)))
+
+    def _delete_entries(self, cache_keys: list[str]):
+        """Remove metadata entries from the store"""
+        self._db.executemany('DELETE FROM entries WHERE cache_key = ?', [(key,) for key in cache_keys])
+
+    def _schedule_hits_flush(self):
+        """
+        Persist hit_count/last_used updates from cache hits later.
+
+        Hits only touch memory; the updates are written in one batch
+        LAST_USED_FLUSH_SECONDS after the first unsaved hit, since losing a
+        few timestamps is harmless. Must be called with _lock held.
+        """
+        if self._hits_timer is None:
+            self._hits_timer = threading.Timer(LAST_USED_FLUSH_SECONDS, self._flush_hits_later)
+            self._hits_timer.daemon = True
+            self._hits_timer.start()
+
+    def _flush_hits_later(self):
+        with self._lock:
+            self._hits_timer = None
+            self._flush_hits()
+        self._flush_metadata()
+
+    def _flush_hits(self):
+        """Write pending hit_count/last_used updates in one batch (call with _lock held)"""
+        if not self._dirty_keys:
+            return
+
+        try:
+            self._db.executemany(
+                'UPDATE entries SET hit_count = ?, last_used = ? WHERE cache_key = ?',
+                [(self.metadata[key]['hit_count'], self.metadata[key]['last_used'], key)
+                 for key in self._dirty_keys if key in self.metadata]
+            )
+        except Exception as e:
+            log('error', f'Failed to save cache hits: {e}')
+
+        self._dirty_keys.clear()
+        self._metadata_dirty = True  # hit stats live in metadata.json
+
+    _generate_cache_key = staticmethod(_cache_key)  # kept for callers of the old method
+
+    def _get_cache_path(self, cache_key: str, compressed: bool = False) -> Path:
         """Get file path for cached audio"""
-        return self.cache_dir / f"{cache_key}.pcm"
+        return Path(self._cache_file(cache_key, compressed))
+
+    def _cache_file(self, cache_key: str, compressed: bool = False) -> str:
+        """Get file path for cached audio as a plain string (no Path objects on the hit path)"""
+        return self._cache_dir_str + cache_key + ('.pcm.gz' if compressed else '.pcm')
 
-    def get_cached_audio(self, text: str, voice: str, speed: float, provider: str) -> Optional[bytes]:
+    def get_cached_audio(self, text: str, voice: str, speed: float, provider: str) -> Optional[memoryview]:
         """
         Retrieve cached audio if available.
 
@@ -74,44 +336,125 @@ class ResponseCache:
             provider: TTS provider name
 
         Returns:
-            Pre-generated audio bytes, or None if not cached
+            Read-only zero-copy view of the pre-generated audio, or None if not cached
         """
-        cache_key = self._generate_cache_key(text, voice, speed, provider)
-
-        if cache_key not in self.metadata:
-            self.stats['misses'] += 1
-            # Track frequency for future caching
-            self.hit_counts[text] = self.hit_counts.get(text, 0) + 1
-            return None
-
-        # Load cached audio
-        cache_path = self._get_cache_path(cache_key)
-
-        if not cache_path.exists():
-            log('warning', f'Cache metadata exists but file missing: {cache_key}')
-            del self.metadata[cache_key]
-            self.stats['misses'] += 1
-            return None
-
-        try:
-            with open(cache_path, 'rb') as f:
-                audio_data = f.read()
-
-            # Update stats
-            self.stats['hits'] += 1
-            self.stats['total_saved_ms'] += 950  # Estimated savings
-            self.metadata[cache_key]['last_used'] = time.time()
-            self.metadata[cache_key]['hit_count'] += 1
-
+        cache_key = _cache_key(text, voice, speed, provider)
+
+        with self._lock:
+            meta = self.metadata.get(cache_key)
+            if meta is not None:
+                audio_data = self._load_entry(cache_key, meta)
+            else:
+                # Track frequency for future caching
+                self.hit_counts[text] += 1
+
+        if meta is None:
+            # Fall back to a paraphrase (embedded outside the lock)
+            similar_key = self._find_similar(text, voice, speed, provider)
+            with self._lock:
+                meta = self.metadata.get(similar_key) if similar_key is not None else None
+                if meta is None:
+                    self.stats.misses += 1
+                    return None
+                audio_data = self._load_entry(similar_key, meta)
+
+        if audio_data is not None:
             log('debug', f'Cache HIT: "{text[:50]}..." (saved ~950ms)')
-            return audio_data
-
-        except Exception as e:
-            log('error', f'Failed to load cached audio: {e}')
-            self.stats['misses'] += 1
-            return None
+        return audio_data
+
+    def _load_entry(self, cache_key: str, meta: dict) -> Optional[memoryview]:
+        """Serve a cached entry and record the hit, or the miss if its audio is gone (call with _lock held)"""
+        # Audio still waiting for the writer is served from memory
+        pending = self._pending.get(cache_key)
+        if pending is not None:
+            audio_data = memoryview(pending).toreadonly()  # pending may be the caller's bytearray
+        else:
+            # Load cached audio (no exists() probe, a missing file is the rare case)
+            try:
+                audio_data = self._read_audio(cache_key, self._cache_file(cache_key, meta['file_path'].endswith('.gz')))
+            except FileNotFoundError:
+                log('warning', f'Cache metadata exists but file missing: {cache_key}')
+                self._unmap(cache_key)
+                self._cache_size_bytes -= self.metadata.pop(cache_key)['size']
+                self._embeddings.pop(cache_key, None)
+                self._delete_entries([cache_key])
+                self.stats.misses += 1
+                return None
+            except Exception as e:
+                log('error', f'Failed to load cached audio: {e}')
+                self.stats.misses += 1
+                return None
+
+        # Update stats
+        self.stats.hits += 1
+        self.stats.total_saved_ms += 950  # Estimated savings
+        meta['last_used'] = time.time()
+        meta['hit_count'] += 1
+        self.metadata.move_to_end(cache_key)
+        self._dirty_keys.add(cache_key)
+        self._schedule_hits_flush()
+        return audio_data
+
+    def _read_audio(self, cache_key: str, cache_path: str) -> memoryview:
+        """Read cached audio through a memory mapping kept open for hot files"""
+        if cache_path.endswith('.gz'):
+            audio_data = self._decompressed.get(cache_key)
+            if audio_data is not None:
+                self._decompressed.move_to_end(cache_key)
+                return memoryview(audio_data)
+
+            audio_data = gzip.decompress(self._read_file(cache_path))
+            self._decompressed[cache_key] = audio_data
+            if len(self._decompressed) > self.max_mapped_files:
+                self._decompressed.popitem(last=False)
+            return memoryview(audio_data)
+
+        mapped = self._mmaps.get(cache_key)
+        if mapped is not None:
+            self._mmaps.move_to_end(cache_key)
+            return memoryview(mapped)
+
+        mapped = self._map_file(cache_path)
+        if mapped is None:
+            return memoryview(b'')
+
+        self._add_mapping(cache_key, mapped)
+        return memoryview(mapped)
+
+    @staticmethod
+    def _map_file(cache_path: str) -> Optional[mmap.mmap]:
+        """Memory-map a cached file read-only (None if it is empty, those can't be mapped)"""
+        fd = os.open(cache_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            if os.fstat(fd).st_size == 0:
+                return None
+            return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+
+    def _add_mapping(self, cache_key: str, mapped: mmap.mmap):
+        """Keep a mapping for future hits, closing the least recently used one beyond the limit (call with _lock held)"""
+        self._mmaps[cache_key] = mapped
+        if len(self._mmaps) > self.max_mapped_files:
+            _, oldest = self._mmaps.popitem(last=False)
+            self._close_mapping(oldest)
+
+    def _unmap(self, cache_key: str):
+        """Forget the memory mapping (or decompressed copy) of a cached file before it is replaced or deleted"""
+        self._decompressed.pop(cache_key, None)
+        mapped = self._mmaps.pop(cache_key, None)
+        if mapped is not None:
+            self._close_mapping(mapped)
+
+    @staticmethod
+    def _close_mapping(mapped: mmap.mmap):
+        """Close a mapping, unless a caller still holds a view of it (it is unmapped once released)"""
+        try:
+            mapped.close()
+        except BufferError:
+            pass
 
-    def cache_audio(self, text: str, voice: str, speed: float, provider: str, audio_data: bytes):
+    def cache_audio(self, text: str, voice: str, speed: float, provider: str, audio_data: bytes | bytearray):
         """
         Cache generated audio for future use.
 
@@ -120,46 +463,203 @@ class ResponseCache:
             voice: TTS voice used
             speed: Speech speed used
             provider: TTS provider used
-            audio_data: Generated audio bytes
+            audio_data: Generated audio bytes (a bytearray must not be modified afterwards, it isn't copied)
         """
-        cache_key = self._generate_cache_key(text, voice, speed, provider)
-        cache_path = self._get_cache_path(cache_key)
+        # Check if we should cache this (before deriving the key, most one-off responses stop here)
+        if not self._should_cache(text):
+            return
 
-        try:
-            # Check if we should cache this
-            if not self._should_cache(text):
-                return
+        cache_key = _cache_key(text, voice, speed, provider)
+        cache_path = self._cache_file(cache_key, self.compress)
 
-            # Check cache size
+        try:
             audio_size = len(audio_data)
-            if self._get_cache_size() + audio_size > self.max_size_bytes:
-                self._evict_lru()
-
-            # Write audio to disk
-            with open(cache_path, 'wb') as f:
-                f.write(audio_data)
-
-            # Update metadata
-            self.metadata[cache_key] = {
-                'text': text[:100],  # Store truncated for debugging
-                'voice': voice,
-                'speed': speed,
-                'provider': provider,
-                'hit_count': 1,
-                'last_used': time.time(),
-                'created': time.time(),
-                'size': audio_size,
-                'file_path': str(cache_path)
-            }
 
-            self.stats['generations'] += 1
-            self._save_metadata()
+            with self._lock:
+                if self._closed:
+                    return
+                if self._write_queue.full():
+                    log('debug', f'Cache writer busy, not caching: "{text[:50]}..."')
+                    return
+
+                # Check cache size
+                if self._get_cache_size() + audio_size > self.max_size_bytes:
+                    self._evict_lru(audio_size)
+
+                # Update metadata
+                replaced = self.metadata.get(cache_key)
+                if replaced:
+                    self._cache_size_bytes -= replaced['size']
+                    if replaced['file_path'] != cache_path:  # compression was toggled
+                        self._unmap(cache_key)
+                        self._delete_file(Path(replaced['file_path']))
+                self._cache_size_bytes += audio_size
+                self.metadata[cache_key] = {
+                    'text': text[:100],  # Store truncated for debugging
+                    'voice': voice,
+                    'speed': speed,
+                    'provider': provider,
+                    'hit_count': max(self.hit_counts[text], 1),  # uses before caching count for eviction too
+                    'last_used': time.time(),
+                    'created': time.time(),
+                    'size': audio_size,
+                    'file_path': cache_path
+                }
+                self.metadata.move_to_end(cache_key)
+                self._dirty_keys.discard(cache_key)
+
+                # Hand the disk write to the writer thread
+                self._pending[cache_key] = audio_data
+                self._write_queue.put_nowait((cache_key, cache_path, audio_data, text))
+
+                self.stats.generations += 1
 
             log('debug', f'Cached audio: "{text[:50]}..." ({audio_size} bytes)')
 
         except Exception as e:
             log('error', f'Failed to cache audio: {e}')
 
+    def _writer_loop(self):
+        """Write queued audio files and their metadata in the background"""
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                self._write_queue.task_done()
+                return
+            cache_key, cache_path, audio_data, text = item
+            tmp_path = cache_path + '.tmp'
+            try:
+                with self._lock:
+                    if self._pending.get(cache_key) is not audio_data:
+                        continue  # replaced, evicted or cleared while queued
+
+                # Compress and write next to the target outside the lock, hits and
+                # cache_audio on the TTS thread shouldn't wait for the disk
+                stored = gzip.compress(audio_data, compresslevel=1) if cache_path.endswith('.gz') else audio_data
+                self._write_file(tmp_path, stored)
+
+                with self._lock:
+                    if self._pending.get(cache_key) is not audio_data:
+                        self._delete_file(Path(tmp_path))
+                        continue  # replaced, evicted or cleared while writing
+
+                    if stored is not audio_data:
+                        # The size budget counts bytes on disk
+                        meta = self.metadata[cache_key]
+                        self._cache_size_bytes += len(stored) - meta['size']
+                        meta['size'] = len(stored)
+
+                    # Swap the new file in, so views still reading a mapping of the old file keep valid data
+                    self._unmap(cache_key)
+                    os.replace(tmp_path, cache_path)
+                    self._save_entry(cache_key)
+                    del self._pending[cache_key]
+
+                self._schedule_metadata_save()
+                self._add_embedding(cache_key, text)
+
+            except Exception as e:
+                log('error', f'Failed to write cached audio: {e}')
+                self._delete_file(Path(tmp_path))
+                with self._lock:
+                    if self._pending.get(cache_key) is audio_data:
+                        del self._pending[cache_key]
+
+            finally:
+                self._write_queue.task_done()
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        """Read a whole file with raw os calls, sized from fstat (no buffered file object in between)"""
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            parts = [os.read(fd, os.fstat(fd).st_size)]
+            while chunk := os.read(fd, 64 * 1024):  # only if the file grew or the read came up short
+                parts.append(chunk)
+        finally:
+            os.close(fd)
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    @staticmethod
+    def _write_file(path: str, data: bytes | bytearray):
+        """Write data with raw os calls (no buffered file object in between)"""
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+
+    def flush(self):
+        """Block until all queued cache writes and hit updates are on disk"""
+        self._write_queue.join()
+        with self._lock:
+            self._flush_hits()
+        self._flush_metadata()
+
+    def close(self):
+        """
+        Flush pending writes, then stop the writer thread and timers and close the metadata store.
+
+        The writer thread references the cache, so a cache that isn't closed is never freed.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            # Later cache_audio calls return early, so nothing is queued behind the stop sentinel
+            self._closed = True
+
+        # Stop the warm-up first, its results would only be dropped
+        self._warm_stop.set()
+        if self._warm_thread is not None:
+            self._warm_thread.join()
+            self._warm_thread = None
+
+        self._write_queue.join()
+        self._write_queue.put(None)
+        self._writer.join()
+
+        # Stop the timers, then do their work now
+        with self._lock:
+            timers = (self._hits_timer, self._flush_timer)
+            self._hits_timer = self._flush_timer = None
+        for timer in timers:
+            if timer is not None:
+                timer.cancel()
+                timer.join()
+        # The writer is gone, so flush() would wait on the queue: save the hits and metadata directly
+        with self._lock:
+            self._flush_hits()
+        self._flush_metadata()
+
+        with self._lock:
+            for cache_key in list(self._mmaps):
+                self._unmap(cache_key)
+            self._decompressed.clear()
+            self._db.close()
+        _live_caches.discard(self)
+
+    def _schedule_metadata_save(self):
+        """Mark metadata.json stale and save it shortly, so a burst of inserts costs one write"""
+        with self._lock:
+            self._metadata_dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(METADATA_FLUSH_SECONDS, self._flush_metadata)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_metadata(self):
+        """Save metadata.json if it has unsaved changes"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()  # called early by flush(), or a no-op from the timer itself
+            self._flush_timer = None
+            if not self._metadata_dirty:
+                return
+            self._metadata_dirty = False
+        self._save_metadata()
+
     def _should_cache(self, text: str) -> bool:
         """
         Decide if response should be cached.
@@ -167,105 +667,216 @@ class ResponseCache:
         Strategy:
         - Cache if used 3+ times
         - Always cache common action confirmations
-        - Don't cache very long responses (>200 chars)
+        - Don't cache empty or very long responses (>200 chars)
         """
-        # Don't cache long responses (they're unique)
-        if len(text) > 200:
+        # Don't cache long responses (they're unique), one range check also rejects empty text
+        if not 0 < len(text) <= 200:
             return False
 
-        # Always cache known common phrases
-        common_phrases = [
-            'hardpoints deployed',
-            'setting speed',
-            'shields up',
-            'understood',
-            'cargo scoop',
-            'landing gear',
-            'frameshift',
-            'jump complete'
-        ]
-
-        text_lower = text.lower()
-        for phrase in common_phrases:
-            if phrase in text_lower:
-                return True
+        # Always cache known common phrases (islower() skips the copy for already-lowercase text)
+        text_lower = text if text.islower() else text.lower()
+        if text_lower in _COMMON_PHRASES_SET or _COMMON_PHRASES_RE.search(text_lower):
+            return True
 
         # Cache if seen 3+ times
-        hit_count = self.hit_counts.get(text, 0)
-        return hit_count >= 3
+        return self.hit_counts[text] >= 3
 
     def _get_cache_size(self) -> int:
         """Get total cache size in bytes"""
-        return sum(meta['size'] for meta in self.metadata.values())
-
-    def _evict_lru(self):
-        """Evict least recently used cached items to free space"""
-        # Sort by last_used (oldest first)
-        items = sorted(
-            self.metadata.items(),
-            key=lambda x: x[1]['last_used']
-        )
-
-        # Remove oldest 20% of cache
-        evict_count = max(1, len(items) // 5)
+        return self._cache_size_bytes
 
-        for cache_key, meta in items[:evict_count]:
-            cache_path = Path(meta['file_path'])
-            if cache_path.exists():
-                cache_path.unlink()
+    def _evict_lru(self, needed_bytes: int = 0):
+        """
+        Evict cached items in one pass until needed_bytes more fit within EVICTION_TARGET of
+        the size limit, rarely used ones first among the least recently used.
+        """
+        now = time.time()
+        target_bytes = self.max_size_bytes * EVICTION_TARGET - needed_bytes
+
+        def score(item: Tuple[str, dict]) -> float:
+            # Frequency dominates, recency breaks ties
+            meta = item[1]
+            return meta['hit_count'] * 100 + 1 / max(now - meta['last_used'], 1.0)
+
+        evicted_keys = []
+        while self.metadata and (not evicted_keys or self._cache_size_bytes > target_bytes):
+            # metadata is kept in LRU order, so the candidates are the oldest entries
+            cache_key, meta = min(itertools.islice(self.metadata.items(), EVICTION_SAMPLE), key=score)
             del self.metadata[cache_key]
+            self._unmap(cache_key)
+            self._pending.pop(cache_key, None)
+            self._embeddings.pop(cache_key, None)
+            self._delete_file(Path(meta['file_path']))
+            self._cache_size_bytes -= meta['size']
+            self._dirty_keys.discard(cache_key)
+            evicted_keys.append(cache_key)
             log('debug', f'Evicted cache: {meta["text"][:50]}...')
 
-        self._save_metadata()
+        self._delete_entries(evicted_keys)
+
+    def _delete_file(self, cache_path: Path):
+        """Delete a cached audio file (Windows refuses while a view of it is still mapped)"""
+        try:
+            cache_path.unlink(missing_ok=True)
+        except OSError as e:
+            log('debug', f'Could not delete cached audio {cache_path.name}: {e}')
 
     def _load_metadata(self):
         """Load cache metadata from disk"""
         metadata_path = self.cache_dir / 'metadata.json'
 
-        if not metadata_path.exists():
-            return
-
         try:
-            with open(metadata_path, 'r') as f:
+            with open(metadata_path, 'rb') as f:
                 data = json.load(f)
-                self.metadata = data.get('cache', {})
-                self.stats = data.get('stats', self.stats)
-                self.hit_counts = data.get('hit_counts', {})
+            self.stats = Stats.from_dict(data.get('stats', {}))
+            self.hit_counts = Counter(data.get('hit_counts', {}))
+
+            # Older versions kept the entries in metadata.json
+            legacy_entries = data.get('cache', {})
+            if legacy_entries:
+                self._db.executemany(_UPSERT_ENTRY_SQL, [
+                    (cache_key, *(meta.get(column) for column in _ENTRY_COLUMNS))
+                    for cache_key, meta in legacy_entries.items()
+                ])
+                log('info', f'Migrated {len(legacy_entries)} response cache entries to metadata.db')
+                # Drop them from metadata.json, or the next start would migrate them again over newer rows
+                self._save_metadata()
+
+        except FileNotFoundError:
+            pass  # first run, nothing saved yet
+        except Exception as e:
+            log('error', f'Failed to load cache metadata: {e}')
+
+        try:
+            rows = self._db.execute(
+                f"SELECT cache_key, {', '.join(_ENTRY_COLUMNS)} FROM entries ORDER BY last_used").fetchall()
+            self.metadata = OrderedDict((row[0], dict(zip(_ENTRY_COLUMNS, row[1:]))) for row in rows)
+            self._cache_size_bytes = sum(meta['size'] for meta in self.metadata.values())
 
             log('info', f'Loaded response cache: {len(self.metadata)} items')
 
         except Exception as e:
-            log('error', f'Failed to load cache metadata: {e}')
+            log('error', f'Failed to load cache entries: {e}')
 
     def _save_metadata(self):
-        """Save cache metadata to disk"""
+        """Save cache stats and phrase frequencies to disk (entries are saved individually)"""
         metadata_path = self.cache_dir / 'metadata.json'
 
         try:
+            # Snapshot, the dicts keep changing on the TTS thread while we serialize
             data = {
-                'cache': self.metadata,
-                'stats': self.stats,
-                'hit_counts': self.hit_counts
+                'stats': self.stats.as_dict(),
+                'hit_counts': dict(self.hit_counts)
             }
 
-            with open(metadata_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            payload = json.dumps(data, separators=(',', ':')).encode()
+
+            # Write compact JSON to a temp file and swap it in atomically,
+            # so a crash mid-write can't leave a truncated metadata.json
+            tmp_path = metadata_path.with_suffix('.tmp')
+            with self._metadata_lock:
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, metadata_path)
 
         except Exception as e:
             log('error', f'Failed to save cache metadata: {e}')
 
-    def warm_cache(self, common_responses: list[Tuple[str, str, float, str]]):
+    def warm_cache(self, common_responses: list[Tuple[str, str, float, str]],
+                   tts_callable: Optional[Callable[[str, str, float, str], bytes]] = None):
         """
         Pre-generate audio for common responses on startup.
 
         Args:
             common_responses: List of (text, voice, speed, provider) tuples to pre-cache
+            tts_callable: Synthesizes the full audio for (text, voice, speed, provider).
+                Without it, phrases are only marked as cacheable on first use.
         """
         log('info', f'Warming response cache with {len(common_responses)} common phrases...')
-        # Cache warming happens via normal TTS flow
-        # This just ensures they're marked as cacheable
-        for text, _, _, _ in common_responses:
-            self.hit_counts[text] = 10  # Mark as frequently used
+        # Mark as frequently used in one bulk update (dict.update assigns, Counter.update would add),
+        # without lowering the count of phrases that are already used more often
+        hit_counts = self.hit_counts
+        dict.update(hit_counts, {item[0]: max(hit_counts[item[0]], 10) for item in common_responses})
+
+        keys = [_cache_key(*item) for item in common_responses]
+        present_keys = [cache_key for cache_key in keys if cache_key in self.metadata]
+        missing = [item for item, cache_key in zip(common_responses, keys)
+                   if cache_key not in self.metadata] if tts_callable is not None else []
+
+        if (present_keys or missing) and not self._warm_stop.is_set():
+            self._warm_thread = threading.Thread(
+                target=self._warm, args=(present_keys, missing, tts_callable), name='ResponseCacheWarmer', daemon=True
+            )
+            self._warm_thread.start()
+
+    def _warm(self, present_keys: list[str], missing: list[Tuple[str, str, float, str]],
+              tts_callable: Optional[Callable[[str, str, float, str], bytes]]):
+        """Prefetch phrases already on disk, then generate the rest (runs in a daemon thread)"""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in executor.map(self._preload_key, present_keys):
+                pass
+        if missing and tts_callable is not None and not self._warm_stop.is_set():
+            self._pregenerate(missing, tts_callable)
+
+    def _preload_key(self, cache_key: str):
+        """Map a cached file and read it ahead, so its first hit doesn't wait on the disk"""
+        if self._warm_stop.is_set():
+            return
+        with self._lock:
+            meta = self.metadata.get(cache_key)
+            if (meta is None or cache_key in self._pending or cache_key in self._mmaps
+                    or meta['file_path'].endswith('.gz')):
+                return
+            cache_path = self._cache_file(cache_key)
+
+        # Open, map and read ahead outside the lock, so the workers overlap their disk requests
+        try:
+            mapped = self._map_file(cache_path)
+        except OSError as e:
+            log('debug', f'Could not preload cached audio {cache_key}: {e}')
+            return
+        if mapped is None:
+            return
+
+        if hasattr(mmap, 'MADV_WILLNEED'):
+            mapped.madvise(mmap.MADV_WILLNEED)  # asynchronous readahead
+        else:
+            mapped[::mmap.PAGESIZE]  # no madvise on Windows: touch every page to fault it in
+
+        with self._lock:
+            # Keep the mapping only if the entry wasn't replaced, evicted or mapped by a hit meanwhile
+            if self.metadata.get(cache_key) is meta and cache_key not in self._pending and cache_key not in self._mmaps:
+                self._add_mapping(cache_key, mapped)
+                return
+        self._close_mapping(mapped)
+
+    def _pregenerate(self, responses: list[Tuple[str, str, float, str]],
+                     tts_callable: Callable[[str, str, float, str], bytes]):
+        """Synthesize responses in parallel and cache the results (runs in a daemon thread)"""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = []
+            for item in responses:
+                if self._warm_stop.is_set():
+                    break
+                futures.append(executor.submit(tts_callable, *item))
+            for (text, voice, speed, provider), future in zip(responses, futures):
+                try:
+                    audio_data = future.result()
+                except Exception as e:
+                    log('debug', f'Cache warm-up failed for "{text}": {e}')
+                    continue
+                if self._warm_stop.is_set():
+                    # close() is waiting: drop the rest
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                if audio_data:
+                    self.cache_audio(text, voice, speed, provider, audio_data)
+        log('debug', f'Pre-generated audio for {len(futures)} common phrases')
+
+    def most_common_phrases(self, n: int = 20) -> list[Tuple[str, int]]:
+        """Return the n most frequently requested phrases with their counts (candidates for warm_cache)"""
+        return self.hit_counts.most_common(n)
 
     def get_stats(self) -> dict:
         """
@@ -274,39 +885,55 @@ class ResponseCache:
         Returns:
             Dict with hits, misses, hit_rate, total_saved_ms
         """
-        total_requests = self.stats['hits'] + self.stats['misses']
-        hit_rate = (self.stats['hits'] / total_requests * 100) if total_requests > 0 else 0
+        stats = self.stats
+        total_requests = stats.hits + stats.misses
+        hit_rate = (stats.hits / total_requests * 100) if total_requests > 0 else 0
 
         return {
-            'hits': self.stats['hits'],
-            'misses': self.stats['misses'],
+            'hits': stats.hits,
+            'misses': stats.misses,
             'hit_rate_percent': round(hit_rate, 1),
-            'total_saved_ms': self.stats['total_saved_ms'],
-            'total_saved_seconds': round(self.stats['total_saved_ms'] / 1000, 1),
+            'total_saved_ms': stats.total_saved_ms,
+            'total_saved_seconds': round(stats.total_saved_ms / 1000, 1),
             'cache_size_mb': round(self._get_cache_size() / (1024 * 1024), 2),
             'cached_items': len(self.metadata)
         }
 
     def clear_cache(self):
         """Clear all cached responses"""
-        for meta in self.metadata.values():
-            cache_path = Path(meta['file_path'])
-            if cache_path.exists():
-                cache_path.unlink()
-
-        self.metadata.clear()
-        self.hit_counts.clear()
-        self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'generations': 0,
-            'total_saved_ms': 0
-        }
+        with self._lock:
+            for cache_key in list(self._mmaps):
+                self._unmap(cache_key)
+            self._decompressed.clear()
+            self._pending.clear()
+            self._embeddings.clear()
+
+            for meta in self.metadata.values():
+                self._delete_file(Path(meta['file_path']))
+
+            self.metadata.clear()
+            self._cache_size_bytes = 0
+            self._dirty_keys.clear()
+            self._metadata_dirty = False
+            self._db.execute('DELETE FROM entries')
+            self.hit_counts.clear()
+            self.stats = Stats()
 
         self._save_metadata()
         log('info', 'Response cache cleared')
 
 
+# Open caches with queued audio writes, pending hit updates or metadata.json saves are flushed
+# on interpreter exit (the writer thread keeps a cache alive until close() is called)
+_live_caches: "weakref.WeakSet[ResponseCache]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_caches():
+    for cache in list(_live_caches):
+        cache.flush()  # the writer is a daemon thread, queued audio would be lost otherwise
+
+
 # Common responses to pre-cache (action confirmations)
 COMMON_ACTION_RESPONSES = [
     # Hardpoints
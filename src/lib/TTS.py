@@ -3,7 +3,7 @@ import re
 import threading
 import traceback
 from time import sleep, time
-from typing import Generator, Literal, Optional, Union, final
+from typing import Generator, Iterable, Literal, Optional, Union, final
 
 import edge_tts
 import miniaudio
@@ -15,6 +15,9 @@ from num2words import num2words
 from .Logger import log, show_chat_message
 from .ResponseCache import ResponseCache
 
+# Sentence end followed by whitespace (so "3.5" doesn't split), or a line break
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
 
 @final
 class Mp3Stream(miniaudio.StreamableSource):
@@ -135,10 +138,7 @@ class TTS:
             while not self.is_aborted:
                 if not self.read_queue.empty():
                     self._is_playing = True
-                    text = self.read_queue.get()
-                    # Fix numberformatting for different providers
-                    text = re.sub(r"\d+(,\d{3})*(\.\d+)?", self._number_to_text, text)
-                    text = strip_markdown.strip_markdown(text)
+                    text = self._prepare_text(self.read_queue.get())
                     # print('reading:', text)
                     try:
                         start_time = time()
@@ -185,7 +185,7 @@ class TTS:
         if self.cache:
             cached_audio = self.cache.get_cached_audio(text, self.voice, float(self.speed), self.provider)
             if cached_audio:
-                # Stream cached audio in chunks
+                # Stream cached audio in chunks (zero-copy slices of the cached view)
                 chunk_size = 1024
                 for i in range(0, len(cached_audio), chunk_size):
                     yield cached_audio[i:i+chunk_size]
@@ -193,16 +193,37 @@ class TTS:
 
         # Cache miss - generate audio and cache it
         generated_audio = bytearray()
+        append_audio = generated_audio.extend
+
+        try:
+            for chunk in self._generate_audio(text):
+                append_audio(chunk)
+                yield chunk
+        except openai.APIStatusError as e:
+            log("debug", "TTS error request:", e.request.method, e.request.url, e.request.headers, e.request.read().decode('utf-8', errors='replace'))
+            log("debug", "TTS error response:", e.response.status_code, e.response.headers, e.response.read().decode('utf-8', errors='replace'))
+            
+            try:
+                error: dict = e.body[0] if hasattr(e, 'body') and e.body and isinstance(e.body, list) else e.body # pyright: ignore[reportAssignmentType]
+                message = error.get('error', {}).get('message', e.body if e.body else 'Unknown error')
+            except:
+                message = e.message
+            
+            show_chat_message('error', f'TTS {e.response.reason_phrase}:', message)
+
+        # Cache the generated audio for future use (the buffer is handed over as is, not copied)
+        if self.cache and len(generated_audio) > 0:
+            self.cache.cache_audio(text, self.voice, float(self.speed), self.provider, generated_audio)
 
+    def _generate_audio(self, text) -> Generator[bytes, None, None]:
+        """Synthesize speech for text with the configured provider, yielding PCM chunks"""
         if self.provider == 'none':
             word_count = len(text.split())
             words_per_minute = 150 * float(self.speed)
             audio_duration = word_count / words_per_minute * 60
             # generate silent audio for the duration of the text
             for _ in range(int(audio_duration * 24_000 / 1024)):
-                chunk = b"\x00" * 1024
-                generated_audio.extend(chunk)
-                yield chunk
+                yield b"\x00" * 1024
         elif self.provider == "edge-tts":
             rate = f"+{int((float(self.speed) - 1) * 100)}%" if float(self.speed) > 1 else f"-{int((1 - float(self.speed)) * 100)}%"
             response = edge_tts.Communicate(text, voice=self.voice, rate=rate)
@@ -216,41 +237,27 @@ class TTS:
             )
 
             for i in pcm_stream:
-                chunk = i.tobytes()
-                generated_audio.extend(chunk)
-                yield chunk
+                yield i.tobytes()
 
         elif self.openai_client:
-            try:
-                with self.openai_client.audio.speech.with_streaming_response.create(
-                        model=self.model,
-                        voice=self.voice,
-                        input=text,
-                        response_format="pcm",
-                        # raw samples in 24kHz (16-bit signed, low-endian), without the header.
-                        instructions = self.voice_instructions,
-                        speed=float(self.speed)
-                ) as response:
-                    for chunk in response.iter_bytes(1024):
-                        generated_audio.extend(chunk)
-                        yield chunk
-            except openai.APIStatusError as e:
-                log("debug", "TTS error request:", e.request.method, e.request.url, e.request.headers, e.request.read().decode('utf-8', errors='replace'))
-                log("debug", "TTS error response:", e.response.status_code, e.response.headers, e.response.read().decode('utf-8', errors='replace'))
-                
-                try:
-                    error: dict = e.body[0] if hasattr(e, 'body') and e.body and isinstance(e.body, list) else e.body # pyright: ignore[reportAssignmentType]
-                    message = error.get('error', {}).get('message', e.body if e.body else 'Unknown error')
-                except:
-                    message = e.message
-                
-                show_chat_message('error', f'TTS {e.response.reason_phrase}:', message)
+            with self.openai_client.audio.speech.with_streaming_response.create(
+                    model=self.model,
+                    voice=self.voice,
+                    input=text,
+                    response_format="pcm",
+                    # raw samples in 24kHz (16-bit signed, low-endian), without the header.
+                    instructions = self.voice_instructions,
+                    speed=float(self.speed)
+            ) as response:
+                yield from response.iter_bytes(1024)
         else:
             raise ValueError('No TTS client provided')
 
-        # Cache the generated audio for future use
-        if self.cache and len(generated_audio) > 0:
-            self.cache.cache_audio(text, self.voice, float(self.speed), self.provider, bytes(generated_audio))
+    def _prepare_text(self, text: str) -> str:
+        """Normalize text the way it is spoken (and looked up in the cache)"""
+        # Fix numberformatting for different providers
+        text = re.sub(r"\d+(,\d{3})*(\.\d+)?", self._number_to_text, text)
+        return strip_markdown.strip_markdown(text)
 
     def _number_to_text(self, match: re.Match[str]):
         """Converts numbers like 100,203.12 to one hundred thousand two hundred three point one two"""
@@ -265,6 +272,33 @@ class TTS:
     def say(self, text: str):
         self.read_queue.put(text)
 
+    def say_stream(self, deltas: Iterable[str]) -> str:
+        """
+        Speak streamed LLM text sentence by sentence as it arrives.
+
+        Each completed sentence is queued for playback immediately, so speech
+        starts while the LLM is still generating. Returns the full text.
+        """
+        parts: list[str] = []
+        pending: list[str] = []
+        for delta in deltas:
+            if not delta:
+                continue
+            parts.append(delta)
+            pending.append(delta)
+            if not any(c.isspace() for c in delta):
+                continue
+            *sentences, rest = _SENTENCE_BOUNDARY.split(''.join(pending))
+            for sentence in sentences:
+                if sentence.strip():
+                    self.say(sentence.strip())
+            pending = [rest]
+
+        rest = ''.join(pending).strip()
+        if rest:
+            self.say(rest)
+        return ''.join(parts)
+
     def abort(self):
         while not self.read_queue.empty():
             self.read_queue.get()
@@ -285,11 +319,21 @@ class TTS:
         return {'enabled': False}
 
     def warm_cache(self, common_phrases: list[str]):
-        """Pre-mark common phrases for caching (they'll be cached on first use)"""
+        """Pre-generate audio for common phrases in the background, so their first use is a cache hit"""
         if self.cache:
-            phrases_with_settings = [(phrase, self.voice, float(self.speed), self.provider) for phrase in common_phrases]
-            self.cache.warm_cache(phrases_with_settings)
-            log('info', f'Warmed cache with {len(common_phrases)} common phrases')
+            # Cached under the text playback will look up
+            phrases_with_settings = [
+                (self._prepare_text(phrase), self.voice, float(self.speed), self.provider) for phrase in common_phrases
+            ]
+            self.cache.warm_cache(phrases_with_settings, tts_callable=self._synthesize)
+            log('debug', f'Queued {len(common_phrases)} common phrases for background cache warm-up')
+
+    def _synthesize(self, text: str, voice: str, speed: float, provider: str) -> bytes:
+        """Generate the complete audio for text, if voice/speed/provider are still the current settings"""
+        if (voice, speed, provider) != (self.voice, float(self.speed), self.provider):
+            # Audio is generated with the current settings, it must not be cached under others
+            raise ValueError('TTS settings changed since the phrase was queued')
+        return b''.join(self._generate_audio(text))
 
     def quit(self):
         pass
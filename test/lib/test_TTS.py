@@ -109,4 +109,30 @@ def test_edge_tts_playback(mock_pyaudio, mock_miniaudio, mock_openai):
         sleep(0.1)
     
     assert mock_miniaudio.stream_any.call_count == 1
-    assert mock_pyaudio['stream'].write.call_count == 2
\ No newline at end of file
+    assert mock_pyaudio['stream'].write.call_count == 2
+
+
+def test_say_stream_queues_sentences(mock_pyaudio, mock_openai, monkeypatch):
+    """Test streamed LLM text is queued sentence by sentence"""
+    tts = TTS(mock_openai, provider="openai", model="tts-1", voice="nova", speed=1, enable_cache=False)
+    said = []
+    monkeypatch.setattr(tts, 'say', said.append)
+
+    text = tts.say_stream(["Hello Com", "mander. Speed is 3", ".5 km", "/s! Ok\nNext", " line"])
+
+    assert said == ["Hello Commander.", "Speed is 3.5 km/s!", "Ok", "Next line"]
+    assert text == "Hello Commander. Speed is 3.5 km/s! Ok\nNext line"
+
+
+def test_warm_cache_uses_spoken_text(mock_pyaudio, mock_openai):
+    """Test warm-up caches phrases under the normalized text playback looks up"""
+    tts = TTS(mock_openai, provider="openai", model="tts-1", voice="nova", speed=1, enable_cache=False)
+    tts.cache = MagicMock()
+
+    tts.warm_cache(["Setting speed to 100 percent"])
+
+    phrases = tts.cache.warm_cache.call_args.args[0]
+    assert phrases == [(tts._prepare_text("Setting speed to 100 percent"), "nova", 1.0, "openai")]
+    assert "one hundred" in phrases[0][0]
+    with pytest.raises(ValueError):
+        tts._synthesize(phrases[0][0], "alloy", 1.0, "openai")
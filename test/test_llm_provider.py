@@ -0,0 +1,280 @@
+"""
+Unit tests for LLM provider wrappers
+
+Tests the provider layer without network access by wrapping
+a fake provider that records every request it receives.
+"""
+
+import asyncio
+import concurrent.futures
+import pytest
+import sys
+import threading
+from types import SimpleNamespace
+
+import httpx
+import openai
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from openai.types.chat import ChatCompletion
+
+from lib.LLMProvider import LLMProvider, BatchingProvider, CachedLLMProvider, OpenAICompatibleProvider, PoolProvider, create_llm_provider
+
+
+def make_completion(content: str) -> ChatCompletion:
+    """Build a minimal ChatCompletion"""
+    return ChatCompletion.model_validate({
+        'id': 'chatcmpl-test',
+        'object': 'chat.completion',
+        'created': 0,
+        'model': 'test-model',
+        'choices': [{
+            'index': 0,
+            'finish_reason': 'stop',
+            'message': {'role': 'assistant', 'content': content}
+        }]
+    })
+
+
+class FakeProvider(LLMProvider):
+    """Provider that answers with a numbered completion per call"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_openai_client(self):
+        raise NotImplementedError
+
+    def chat_completion(self, model, messages, temperature=1.0, tools=None, **kwargs):
+        self.calls += 1
+        return make_completion(f"response {self.calls}")
+
+    def chat_completion_with_raw_response(self, model, messages, temperature=1.0, tools=None, **kwargs):
+        raise NotImplementedError
+
+    def chat_completion_stream(self, model, messages, temperature=1.0, tools=None, **kwargs):
+        raise NotImplementedError
+
+    def supports_streaming(self) -> bool:
+        return False
+
+    def supports_tools(self) -> bool:
+        return True
+
+    def get_provider_name(self) -> str:
+        return "Fake"
+
+
+class FailingProvider(FakeProvider):
+    """Provider that fails every call with the given HTTP status"""
+
+    def __init__(self, status_code: int):
+        super().__init__()
+        self.status_code = status_code
+
+    def chat_completion(self, model, messages, temperature=1.0, tools=None, **kwargs):
+        self.calls += 1
+        response = httpx.Response(self.status_code, request=httpx.Request('POST', 'http://localhost/v1/chat/completions'))
+        raise openai.APIStatusError('failed', response=response, body=None)
+
+
+class TestCachedLLMProvider:
+    """Test suite for CachedLLMProvider"""
+
+    @pytest.fixture
+    def fake(self):
+        return FakeProvider()
+
+    @pytest.fixture
+    def cached(self, fake):
+        return CachedLLMProvider(fake, max_size=2)
+
+    def test_deterministic_request_is_cached(self, cached, fake):
+        """Test that identical temperature 0 requests hit the cache"""
+        messages = [{"role": "user", "content": "Deploy hardpoints"}]
+
+        first = cached.chat_completion("test-model", messages, temperature=0)
+        second = cached.chat_completion("test-model", messages, temperature=0)
+
+        assert fake.calls == 1
+        assert second.choices[0].message.content == first.choices[0].message.content
+        assert cached.stats['hits'] == 1
+        assert cached.stats['misses'] == 1
+
+    def test_cached_completion_is_a_copy(self, cached):
+        """Test that callers can't mutate the cached completion"""
+        messages = [{"role": "user", "content": "Deploy hardpoints"}]
+
+        first = cached.chat_completion("test-model", messages, temperature=0)
+        first.choices[0].message.content = "changed"
+        second = cached.chat_completion("test-model", messages, temperature=0)
+
+        assert second.choices[0].message.content == "response 1"
+
+    def test_non_zero_temperature_not_cached(self, cached, fake):
+        """Test that sampled requests always reach the provider"""
+        messages = [{"role": "user", "content": "Tell me a story"}]
+
+        cached.chat_completion("test-model", messages, temperature=1.0)
+        cached.chat_completion("test-model", messages, temperature=1.0)
+
+        assert fake.calls == 2
+        assert cached.stats['hits'] == 0
+
+    def test_lru_eviction(self, cached, fake):
+        """Test that the least recently used entry is evicted"""
+        for text in ["a", "b", "c"]:
+            cached.chat_completion("test-model", [{"role": "user", "content": text}], temperature=0)
+
+        cached.chat_completion("test-model", [{"role": "user", "content": "a"}], temperature=0)
+
+        assert fake.calls == 4
+        assert cached.get_stats()['cached_items'] == 2
+
+    def test_expired_entry_is_refreshed(self, fake):
+        """Test that entries older than the TTL are fetched again"""
+        cached = CachedLLMProvider(fake, ttl_seconds=0)
+        messages = [{"role": "user", "content": "Deploy hardpoints"}]
+
+        cached.chat_completion("test-model", messages, temperature=0)
+        cached.chat_completion("test-model", messages, temperature=0)
+
+        assert fake.calls == 2
+
+
+class TestPoolProvider:
+    """Test suite for PoolProvider"""
+
+    def test_rate_limited_backend_falls_through(self):
+        """Test that a 429 is retried on the next backend"""
+        limited, fake = FailingProvider(429), FakeProvider()
+        pool = PoolProvider([limited, fake])
+
+        completion = pool.chat_completion("test-model", [{"role": "user", "content": "hi"}])
+
+        assert completion.choices[0].message.content == "response 1"
+        assert (limited.calls, fake.calls) == (1, 1)
+        assert pool._inflight == [0, 0]
+
+    def test_client_error_is_raised(self):
+        """Test that non-retryable errors are not retried"""
+        bad, fake = FailingProvider(400), FakeProvider()
+        pool = PoolProvider([bad, fake])
+
+        with pytest.raises(openai.APIStatusError):
+            pool.chat_completion("test-model", [{"role": "user", "content": "hi"}])
+
+        assert fake.calls == 0
+
+    def test_least_loaded_backend_is_picked(self):
+        """Test that a busy backend is skipped"""
+        busy, idle = FakeProvider(), FakeProvider()
+        pool = PoolProvider([busy, idle])
+        pool._inflight[0] = 1
+
+        pool.chat_completion("test-model", [{"role": "user", "content": "hi"}])
+
+        assert (busy.calls, idle.calls) == (0, 1)
+
+
+class TestCreateLLMProvider:
+    """Test the provider factory"""
+
+    def test_local_provider_defaults(self):
+        """Test that local providers get their default endpoint and drop unsupported kwargs"""
+        provider = create_llm_provider('ollama', '')
+
+        assert isinstance(provider, OpenAICompatibleProvider)
+        assert provider.get_provider_name() == "Ollama (http://localhost:11434/v1)"
+        assert provider._filter_kwargs({'verbosity': 'low', 'max_tokens': 10}) == {'max_tokens': 10}
+
+    def test_custom_endpoint_keeps_kwargs(self):
+        """Test that OpenAI-compatible endpoints pass every kwarg through"""
+        provider = create_llm_provider('custom', 'key', endpoint="http://localhost:9999/v1")
+
+        assert provider.get_provider_name() == "OpenAI (http://localhost:9999/v1)"
+        assert provider._filter_kwargs({'verbosity': 'low'}) == {'verbosity': 'low'}
+
+    def test_unknown_provider_raises(self):
+        """Test that unsupported provider types are rejected"""
+        with pytest.raises(ValueError):
+            create_llm_provider('carrier-pigeon', 'key')  # type: ignore
+
+
+class TestBatchingProvider:
+    """Test request coalescing"""
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Test that calls inside the batch window are sent together and answered individually"""
+        batcher = BatchingProvider(create_llm_provider('vllm', ''), batch_window_ms=200)  # type: ignore[arg-type]
+        in_flight = []
+
+        async def create(**request):
+            in_flight.append(request['messages'][0]['content'])
+            await asyncio.sleep(0.05)
+            return make_completion(f"reply to {request['messages'][0]['content']}")
+
+        batcher._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))  # type: ignore
+
+        batch_sizes = []
+        send = batcher._send
+
+        async def record_batch(batch):
+            batch_sizes.append(len(batch))
+            await send(batch)
+
+        batcher._send = record_batch  # type: ignore[method-assign]
+
+        results = {}
+
+        def ask(content):
+            completion = batcher.chat_completion("test-model", [{"role": "user", "content": content}], temperature=0)
+            results[content] = completion.choices[0].message.content
+
+        threads = [threading.Thread(target=ask, args=(c,)) for c in ("a", "b", "c")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert batch_sizes == [3]
+        assert sorted(in_flight) == ["a", "b", "c"]
+        assert results == {c: f"reply to {c}" for c in ("a", "b", "c")}
+        batcher.close()
+
+    def test_close_stops_the_batcher(self):
+        """Test that close() cancels waiting requests, stops the loop thread and closes the pool"""
+        batcher = BatchingProvider(create_llm_provider('vllm', ''), batch_window_ms=10)  # type: ignore[arg-type]
+        started = threading.Event()
+
+        async def create(**request):
+            started.set()
+            await asyncio.sleep(60)
+
+        batcher._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))  # type: ignore
+        errors = []
+
+        def ask():
+            try:
+                batcher.chat_completion("test-model", [{"role": "user", "content": "a"}], temperature=0)
+            except BaseException as e:
+                errors.append(e)
+
+        caller = threading.Thread(target=ask)
+        caller.start()
+        assert started.wait(5)
+        batcher.close()
+        caller.join(timeout=5)
+
+        assert not caller.is_alive()
+        assert len(errors) == 1 and isinstance(errors[0], concurrent.futures.CancelledError)
+        assert not batcher._thread.is_alive()
+        assert batcher._http.is_closed
+        batcher.close()  # closing twice is harmless
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -5,18 +5,25 @@ Tests the response caching system that provides sub-100ms latency
 for frequently used TTS responses.
 """
 
+import gc
+import hashlib
+import json
+import mmap
+import numpy as np
 import pytest
 import shutil
 import tempfile
+import threading
 from pathlib import Path
 import time
 import sys
 import os
+import weakref
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from lib.ResponseCache import ResponseCache
+from lib.ResponseCache import EVICTION_TARGET, ResponseCache, _flush_live_caches
 
 
 class TestResponseCache:
@@ -33,7 +40,10 @@ class TestResponseCache:
     @pytest.fixture
     def cache(self, temp_cache_dir):
         """Create ResponseCache instance with temp directory"""
-        return ResponseCache(cache_dir=temp_cache_dir, max_size_mb=10)
+        cache = ResponseCache(cache_dir=temp_cache_dir, max_size_mb=10)
+        yield cache
+        # Finish background writes and stop the writer before the directory is removed
+        cache.close()
 
     def test_cache_initialization(self, cache):
         """Test cache initializes correctly"""
@@ -75,6 +85,7 @@ class TestResponseCache:
         retrieved = cache.get_cached_audio(text, "nova", 1.0, "openai")
 
         assert retrieved == audio_data
+        assert isinstance(retrieved, memoryview)
         assert cache.stats['hits'] == 1
         assert cache.stats['total_saved_ms'] == 950  # Expected savings per hit
 
@@ -96,6 +107,25 @@ class TestResponseCache:
         assert cache.get_cached_audio(text, "alloy", 1.0, "openai") == b"audio456"
         assert cache.get_cached_audio(text, "nova", 1.5, "openai") == b"audio789"
 
+    def test_cache_key_does_not_depend_on_call_order(self, cache):
+        """Test that the memoized key for speed=1 isn't reused for speed=1.0 (they format differently)"""
+        int_key = cache._generate_cache_key("Order test", "nova", 1, "openai")
+        float_key = cache._generate_cache_key("Order test", "nova", 1.0, "openai")
+
+        assert int_key != float_key
+        assert float_key == hashlib.blake2b(b"Order test|nova|1.0|openai", digest_size=16).hexdigest()
+
+    def test_recache_replaces_mapped_audio(self, cache):
+        """Test that re-caching a hot (memory-mapped) entry returns the new audio"""
+        text = "Shields up"
+
+        cache.cache_audio(text, "nova", 1.0, "openai", b"old_audio")
+        assert cache.get_cached_audio(text, "nova", 1.0, "openai") == b"old_audio"
+
+        cache.cache_audio(text, "nova", 1.0, "openai", b"new_longer_audio")
+        assert cache.get_cached_audio(text, "nova", 1.0, "openai") == b"new_longer_audio"
+        assert cache._get_cache_size() == len(b"new_longer_audio")
+
     def test_should_cache_common_phrases(self, cache):
         """Test that common action phrases are cached immediately"""
         assert cache._should_cache("Hardpoints deployed")
@@ -136,6 +166,7 @@ class TestResponseCache:
         cache1 = ResponseCache(cache_dir=temp_cache_dir)
         cache1.hit_counts[text] = 5
         cache1.cache_audio(text, "nova", 1.0, "openai", audio_data)
+        cache1.close()  # wait for the background writer
 
         # Create new cache instance (simulating restart)
         cache2 = ResponseCache(cache_dir=temp_cache_dir)
@@ -143,6 +174,141 @@ class TestResponseCache:
         # Should load from disk
         retrieved = cache2.get_cached_audio(text, "nova", 1.0, "openai")
         assert retrieved == audio_data
+        cache2.close()
+
+    def test_hits_persist_after_flush(self, temp_cache_dir):
+        """Test that hit counts deferred from the hit path reach disk"""
+        cache1 = ResponseCache(cache_dir=temp_cache_dir)
+        cache1.cache_audio("Shields up", "nova", 1.0, "openai", b"audio")
+        cache1.flush()
+        cache1.get_cached_audio("Shields up", "nova", 1.0, "openai")
+        cache1.get_cached_audio("Shields up", "nova", 1.0, "openai")
+        cache1.flush()
+
+        cache_key = cache1._generate_cache_key("Shields up", "nova", 1.0, "openai")
+        cache2 = ResponseCache(cache_dir=temp_cache_dir)
+        assert cache2.metadata[cache_key]['hit_count'] == cache1.metadata[cache_key]['hit_count']
+        assert cache2.stats['hits'] == 2
+        cache1.close()
+        cache2.close()
+
+    def test_compressed_cache_round_trip(self, temp_cache_dir):
+        """Test that compressed audio is stored gzipped and served decompressed"""
+        audio_data = b"A" * (1024 * 1024)
+
+        cache1 = ResponseCache(cache_dir=temp_cache_dir, compress=True)
+        cache1.cache_audio("Shields up", "nova", 1.0, "openai", audio_data)
+        cache1.flush()
+
+        cache_key = cache1._generate_cache_key("Shields up", "nova", 1.0, "openai")
+        assert cache1._get_cache_path(cache_key, compressed=True).exists()
+        assert cache1._get_cache_size() < len(audio_data) // 10
+
+        cache2 = ResponseCache(cache_dir=temp_cache_dir)
+        assert cache2.get_cached_audio("Shields up", "nova", 1.0, "openai") == audio_data
+        assert cache_key in cache2._decompressed  # repeat hits skip the decompression
+        assert cache2.get_cached_audio("Shields up", "nova", 1.0, "openai") == audio_data
+        cache2.close()
+        cache1.close()
+
+    def test_close_releases_the_cache(self, temp_cache_dir):
+        """Test that a closed cache stops its writer thread and can be garbage collected"""
+        cache = ResponseCache(cache_dir=temp_cache_dir)
+        cache.cache_audio("Shields up", "nova", 1.0, "openai", b"audio")
+        writer = cache._writer
+        cache.close()
+
+        assert not writer.is_alive()
+        assert (Path(temp_cache_dir) / 'metadata.db').exists()
+
+        ref = weakref.ref(cache)
+        del cache
+        gc.collect()
+        assert ref() is None
+
+    def test_cache_audio_after_close_is_ignored(self, temp_cache_dir):
+        """Test that audio arriving after close() is dropped instead of queued for the stopped writer"""
+        cache = ResponseCache(cache_dir=temp_cache_dir)
+        cache.close()
+        cache.cache_audio("Shields up", "nova", 1.0, "openai", b"late_audio")
+
+        assert cache._write_queue.empty()
+        assert not cache._pending
+        cache.flush()  # returns immediately
+
+    def test_queued_writes_are_flushed_on_exit(self, cache):
+        """Test that the exit hook waits for audio still queued for the writer"""
+        cache.cache_audio("Shields up", "nova", 1.0, "openai", b"queued_audio")
+
+        _flush_live_caches()
+
+        cache_key = cache._generate_cache_key("Shields up", "nova", 1.0, "openai")
+        assert cache._get_cache_path(cache_key).read_bytes() == b"queued_audio"
+
+    def test_bytearray_audio_round_trip(self, cache):
+        """Test that a streamed bytearray buffer can be cached without copying it first"""
+        with cache._lock:  # hold the writer back
+            cache.cache_audio("Shields up", "nova", 1.0, "openai", bytearray(b"streamed_audio"))
+            # Hits on the still pending buffer can't modify it
+            assert cache.get_cached_audio("Shields up", "nova", 1.0, "openai").readonly
+        cache.flush()
+
+        assert cache.get_cached_audio("Shields up", "nova", 1.0, "openai") == b"streamed_audio"
+
+    def test_missing_file_is_a_miss(self, cache):
+        """Test that an entry whose file was deleted externally is dropped"""
+        cache.cache_audio("Shields up", "nova", 1.0, "openai", b"audio")
+        cache.flush()
+        cache_key = cache._generate_cache_key("Shields up", "nova", 1.0, "openai")
+        cache._get_cache_path(cache_key).unlink()
+
+        assert cache.get_cached_audio("Shields up", "nova", 1.0, "openai") is None
+        assert cache_key not in cache.metadata
+        assert cache._get_cache_size() == 0
+
+    def test_pending_write_is_a_hit(self, cache):
+        """Test that audio still queued for the writer is served from memory"""
+        text = "Hardpoints deployed"
+        audio_data = b"queued_audio"
+
+        with cache._lock:  # hold the writer back
+            cache.cache_audio(text, "nova", 1.0, "openai", audio_data)
+            assert cache.get_cached_audio(text, "nova", 1.0, "openai") == audio_data
+
+        cache.flush()
+        cache_key = cache._generate_cache_key(text, "nova", 1.0, "openai")
+        assert cache._get_cache_path(cache_key).read_bytes() == audio_data
+
+    def test_legacy_metadata_migration(self, temp_cache_dir):
+        """Test that entries from an old metadata.json are migrated to metadata.db"""
+        audio_path = Path(temp_cache_dir) / "legacy.pcm"
+        audio_path.write_bytes(b"legacy_audio")
+        legacy = {
+            'cache': {
+                'legacy': {
+                    'text': 'Shields up', 'voice': 'nova', 'speed': 1.0, 'provider': 'openai',
+                    'hit_count': 4, 'last_used': 1.0, 'created': 1.0, 'size': 12,
+                    'file_path': str(audio_path)
+                }
+            },
+            'stats': {'hits': 4, 'misses': 1, 'generations': 1, 'total_saved_ms': 3800},
+            'hit_counts': {'Shields up': 5}
+        }
+        (Path(temp_cache_dir) / 'metadata.json').write_text(json.dumps(legacy))
+
+        cache = ResponseCache(cache_dir=temp_cache_dir)
+        assert cache.metadata['legacy']['size'] == 12
+        assert cache.hit_counts['Shields up'] == 5
+        # The migrated entries are removed from metadata.json right away
+        saved = json.loads((Path(temp_cache_dir) / 'metadata.json').read_text())
+        assert 'cache' not in saved
+        assert saved['hit_counts'] == {'Shields up': 5}
+
+        # Entries now come from the database alone
+        reloaded = ResponseCache(cache_dir=temp_cache_dir)
+        assert 'legacy' in reloaded.metadata
+        cache.close()
+        reloaded.close()
 
     def test_cache_eviction_when_full(self, cache):
         """Test LRU eviction when cache reaches max size"""
@@ -163,6 +329,58 @@ class TestResponseCache:
         # Oldest items should be gone
         assert cache.get_cached_audio("Phrase 0", "nova", 1.0, "openai") is None
 
+    def test_eviction_frees_down_to_target(self, cache):
+        """Test that one eviction frees space down to EVICTION_TARGET, not just enough for the new item"""
+        audio_data = b"A" * (1024 * 1024)
+        for i in range(10):  # exactly full
+            cache.hit_counts[f"Phrase {i}"] = 5
+            cache.cache_audio(f"Phrase {i}", "nova", 1.0, "openai", audio_data)
+        assert cache._get_cache_size() == cache.max_size_bytes
+
+        cache.hit_counts["One more"] = 5
+        cache.cache_audio("One more", "nova", 1.0, "openai", audio_data)
+
+        assert cache._get_cache_size() <= EVICTION_TARGET * cache.max_size_bytes
+        assert len(cache.metadata) == 8
+
+    def test_eviction_keeps_frequently_used_phrases(self, cache):
+        """Test that a hot phrase survives eviction even when it is the least recently used"""
+        audio_data = b"A" * (1024 * 1024)
+        cache.cache_audio("Hardpoints deployed", "nova", 1.0, "openai", audio_data)
+        for _ in range(5):
+            cache.get_cached_audio("Hardpoints deployed", "nova", 1.0, "openai")
+
+        for i in range(12):
+            cache.hit_counts[f"Phrase {i}"] = 5
+            cache.cache_audio(f"Phrase {i}", "nova", 1.0, "openai", audio_data)
+
+        assert cache.get_cached_audio("Hardpoints deployed", "nova", 1.0, "openai") == audio_data
+        assert cache.get_cached_audio("Phrase 0", "nova", 1.0, "openai") is None
+
+    def test_eviction_counts_uses_before_caching(self, cache):
+        """Test that a warmed phrase cached first isn't evicted ahead of newer one-off phrases"""
+        audio_data = b"A" * (1024 * 1024)
+        cache.warm_cache([("Shields up", "nova", 1.0, "openai")])
+        cache.cache_audio("Shields up", "nova", 1.0, "openai", audio_data)
+
+        for i in range(12):
+            cache.hit_counts[f"Phrase {i}"] = 3
+            cache.cache_audio(f"Phrase {i}", "nova", 1.0, "openai", audio_data)
+
+        assert cache.get_cached_audio("Shields up", "nova", 1.0, "openai") == audio_data
+
+    def test_metadata_writes_are_coalesced(self, cache, monkeypatch):
+        """Test that a burst of inserts rewrites metadata.json once"""
+        saves = []
+        monkeypatch.setattr(cache, '_save_metadata', lambda: saves.append(1))
+
+        for i in range(20):
+            cache.hit_counts[f"Phrase {i}"] = 5
+            cache.cache_audio(f"Phrase {i}", "nova", 1.0, "openai", b"audio")
+        cache.flush()
+
+        assert len(saves) == 1
+
     def test_get_stats(self, cache):
         """Test cache statistics reporting"""
         text = "Test phrase"
@@ -221,6 +439,91 @@ class TestResponseCache:
         for text, _, _, _ in common_phrases:
             assert cache.hit_counts.get(text, 0) >= 3
 
+    def test_warm_cache_keeps_higher_counts(self, cache):
+        """Test that warming doesn't lower the count of an already frequent phrase"""
+        cache.hit_counts["Shields up"] = 25
+
+        cache.warm_cache([("Shields up", "nova", 1.0, "openai")])
+
+        assert cache.hit_counts["Shields up"] == 25
+
+    def test_warm_cache_pregenerates_audio(self, cache):
+        """Test that warming with a TTS callable makes the first use a hit"""
+        cache.cache_audio("Shields up", "nova", 1.0, "openai", b"existing")
+        common_phrases = [
+            ("Hardpoints deployed", "nova", 1.0, "openai"),
+            ("Shields up", "nova", 1.0, "openai")
+        ]
+        synthesized = []
+
+        def fake_tts(text, voice, speed, provider):
+            synthesized.append(text)
+            return text.encode()
+
+        cache.warm_cache(common_phrases, tts_callable=fake_tts)
+
+        key = cache._generate_cache_key("Hardpoints deployed", "nova", 1.0, "openai")
+        deadline = time.time() + 5
+        while key not in cache.metadata and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert cache.get_cached_audio("Hardpoints deployed", "nova", 1.0, "openai") == b"Hardpoints deployed"
+        # Phrases already in the cache are not synthesized again
+        assert synthesized == ["Hardpoints deployed"]
+
+    def test_close_stops_warm_up(self, temp_cache_dir):
+        """Test that close() waits for the warm-up thread and drops audio it synthesizes meanwhile"""
+        cache = ResponseCache(cache_dir=temp_cache_dir)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_tts(text, voice, speed, provider):
+            started.set()
+            release.wait(5)
+            return text.encode()
+
+        cache.warm_cache([("Hardpoints deployed", "nova", 1.0, "openai")], tts_callable=slow_tts)
+        assert started.wait(5)
+        closer = threading.Thread(target=cache.close)
+        closer.start()
+        assert cache._warm_stop.wait(5)
+        release.set()
+        closer.join(5)
+
+        assert not closer.is_alive()
+        assert cache._warm_thread is None
+        assert not cache.metadata
+
+    def test_warm_cache_preloads_cached_audio(self, temp_cache_dir):
+        """Test that warming maps phrases already on disk from a previous run"""
+        cache1 = ResponseCache(cache_dir=temp_cache_dir)
+        cache1.cache_audio("Shields up", "nova", 1.0, "openai", b"shields_audio")
+        cache1.close()
+
+        cache2 = ResponseCache(cache_dir=temp_cache_dir)
+        cache2.warm_cache([("Shields up", "nova", 1.0, "openai")])
+
+        key = cache2._generate_cache_key("Shields up", "nova", 1.0, "openai")
+        deadline = time.time() + 5
+        while key not in cache2._mmaps and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert key in cache2._mmaps
+        assert cache2.get_cached_audio("Shields up", "nova", 1.0, "openai") == b"shields_audio"
+        cache2.close()
+
+    def test_preload_without_madvise(self, cache, monkeypatch):
+        """Test that preloading also works where mmap has no MADV_WILLNEED (Windows)"""
+        cache.cache_audio("Shields up", "nova", 1.0, "openai", b"shields_audio")
+        cache.flush()
+        key = cache._generate_cache_key("Shields up", "nova", 1.0, "openai")
+        monkeypatch.delattr(mmap, 'MADV_WILLNEED', raising=False)
+
+        cache._preload_key(key)
+
+        assert key in cache._mmaps
+        assert cache.get_cached_audio("Shields up", "nova", 1.0, "openai") == b"shields_audio"
+
     def test_hit_count_tracking(self, cache):
         """Test that cache tracks phrase frequency"""
         text = "Frequently used phrase"
@@ -232,6 +535,14 @@ class TestResponseCache:
         # Should be tracked
         assert cache.hit_counts[text] == 5
 
+    def test_most_common_phrases(self, cache):
+        """Test that the most requested phrases are reported first"""
+        for text, count in (("Shields up", 2), ("Hardpoints deployed", 4), ("Landing gear down", 1)):
+            for _ in range(count):
+                cache.get_cached_audio(text, "nova", 1.0, "openai")
+
+        assert cache.most_common_phrases(2) == [("Hardpoints deployed", 4), ("Shields up", 2)]
+
     def test_last_used_timestamp_updates(self, cache):
         """Test that last_used timestamp updates on cache hits"""
         text = "Test phrase"
@@ -256,6 +567,74 @@ class TestResponseCache:
         assert new_timestamp > initial_timestamp
 
 
+class TestSemanticResponseCache:
+    """Test suite for semantic (paraphrase) lookups"""
+
+    VECTORS = {
+        "Weapons deployed, Commander": [1.0, 0.0, 0.0],
+        "Weapons are deployed": [0.98, 0.2, 0.0],
+        "Landing gear down": [0.0, 0.0, 1.0],
+    }
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        """Create semantic ResponseCache with a fake embedding model"""
+        def encode(text):
+            vector = np.array(self.VECTORS.get(text, [0.0, 1.0, 0.0]))
+            return vector / np.linalg.norm(vector)
+
+        monkeypatch.setattr(ResponseCache, '_load_semantic_model', lambda self: encode)
+        temp_dir = tempfile.mkdtemp()
+        cache = ResponseCache(cache_dir=temp_dir, enable_semantic=True)
+        yield cache
+        cache.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_paraphrase_hits_similar_phrase(self, cache):
+        """Test that a paraphrase is served from the most similar cached phrase"""
+        cache.hit_counts["Weapons deployed, Commander"] = 5
+        cache.cache_audio("Weapons deployed, Commander", "nova", 1.0, "openai", b"weapons_audio")
+        cache.flush()
+
+        assert cache.get_cached_audio("Weapons are deployed", "nova", 1.0, "openai") == b"weapons_audio"
+        assert cache.stats['hits'] == 1
+
+    def test_query_is_embedded_outside_the_lock(self, cache):
+        """Test that model inference on a miss doesn't hold the cache lock"""
+        cache.hit_counts["Weapons deployed, Commander"] = 5
+        cache.cache_audio("Weapons deployed, Commander", "nova", 1.0, "openai", b"weapons_audio")
+        cache.flush()
+
+        encode = cache._encode
+        lock_held = []
+        cache._encode = lambda text: lock_held.append(cache._lock._is_owned()) or encode(text)
+
+        assert cache.get_cached_audio("Weapons are deployed", "nova", 1.0, "openai") == b"weapons_audio"
+        assert lock_held == [False]
+
+    def test_dissimilar_phrase_misses(self, cache):
+        """Test that unrelated phrases don't match"""
+        cache.cache_audio("Landing gear down", "nova", 1.0, "openai", b"gear_audio")
+        cache.flush()
+
+        assert cache.get_cached_audio("Weapons are deployed", "nova", 1.0, "openai") is None
+
+    def test_other_voice_misses(self, cache):
+        """Test that matches require identical TTS settings"""
+        cache.hit_counts["Weapons deployed, Commander"] = 5
+        cache.cache_audio("Weapons deployed, Commander", "nova", 1.0, "openai", b"weapons_audio")
+        cache.flush()
+
+        assert cache.get_cached_audio("Weapons are deployed", "alloy", 1.0, "openai") is None
+
+    def test_numeric_phrases_never_match(self, cache):
+        """Test that responses with numbers are only matched exactly"""
+        cache.cache_audio("Setting speed to 50 percent", "nova", 1.0, "openai", b"fifty_audio")
+        cache.flush()
+
+        assert cache.get_cached_audio("Setting speed to 75 percent", "nova", 1.0, "openai") is None
+
+
 class TestResponseCacheIntegration:
     """Integration tests with mock TTS"""
 
@@ -317,6 +696,7 @@ class TestResponseCacheIntegration:
         print(f"  Hit rate: {stats['hit_rate_percent']}%")
         print(f"  Time saved: {stats['total_saved_seconds']}s")
         print(f"  Cached items: {stats['cached_items']}")
+        cache.close()
 
     def test_performance_benchmark(self, temp_cache_dir):
         """Benchmark cache performance vs no cache"""
@@ -348,6 +728,7 @@ class TestResponseCacheIntegration:
 
         # Should be very fast (<10ms)
         assert avg_time_ms < 10, f"Cache too slow: {avg_time_ms}ms"
+        cache.close()
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ Tests the full integration of response caching in the TTS system.
 """
 
 import pytest
+import random
 import shutil
 import tempfile
 import time
@@ -19,6 +20,24 @@ from lib.TTS import TTS
 from lib.ResponseCache import ResponseCache
 
 
+@pytest.fixture(scope="module")
+def shared_cache_dir():
+    """Temporary cache directory shared by the tests of this module"""
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def cache(shared_cache_dir):
+    """Response cache in the shared directory, emptied after each test"""
+    cache = ResponseCache(cache_dir=shared_cache_dir)
+    yield cache
+    cache.flush()
+    cache.clear_cache()
+    cache.close()
+
+
 class TestTTSCacheIntegration:
     """Integration tests for TTS cache"""
 
@@ -34,13 +53,13 @@ class TestTTSCacheIntegration:
         """Mock OpenAI client for testing"""
         client = Mock()
 
-        # Mock streaming response
+        # Mock streaming response (a fresh generator per call, like the real client)
         mock_response = Mock()
-        mock_response.iter_bytes = Mock(return_value=[
-            b"chunk1" * 256,  # 1024 bytes
+        mock_response.iter_bytes = Mock(side_effect=lambda *_: iter([
+            b"chunk1" * 256,  # 1536 bytes
             b"chunk2" * 256,
             b"chunk3" * 256,
-        ])
+        ]))
 
         mock_context = Mock()
         mock_context.__enter__ = Mock(return_value=mock_response)
@@ -50,92 +69,58 @@ class TestTTSCacheIntegration:
 
         return client
 
-    def test_tts_cache_initialization(self, mock_openai_client, temp_cache_dir):
-        """Test TTS initializes with cache enabled"""
-        with patch('lib.ResponseCache.ResponseCache') as MockCache:
-            MockCache.return_value = ResponseCache(cache_dir=temp_cache_dir)
-
+    @pytest.fixture
+    def tts(self, request, mock_openai_client, temp_cache_dir):
+        """TTS with its cache in the temp dir (parametrize indirectly with False to disable the cache)"""
+        with patch('lib.TTS.ResponseCache', lambda: ResponseCache(cache_dir=temp_cache_dir)):
             tts = TTS(
                 openai_client=mock_openai_client,
                 provider='openai',
                 voice='nova',
                 speed=1.0,
-                enable_cache=True
+                enable_cache=getattr(request, 'param', True)
             )
+        yield tts
+        if tts.cache:
+            tts.cache.close()
 
-            # Cache should be initialized
-            assert tts.cache is not None
+    def test_tts_cache_initialization(self, tts):
+        """Test TTS initializes with cache enabled"""
+        # Cache should be initialized
+        assert tts.cache is not None
 
-    def test_tts_cache_disabled(self, mock_openai_client):
+    @pytest.mark.parametrize('tts', [False], indirect=True)
+    def test_tts_cache_disabled(self, tts):
         """Test TTS works without cache"""
-        tts = TTS(
-            openai_client=mock_openai_client,
-            provider='openai',
-            voice='nova',
-            speed=1.0,
-            enable_cache=False
-        )
-
         # Cache should be None
         assert tts.cache is None
 
-    def test_cache_warm_integration(self, mock_openai_client, temp_cache_dir):
+    def test_cache_warm_integration(self, tts):
         """Test cache warming through TTS"""
-        with patch('lib.ResponseCache.ResponseCache') as MockCache:
-            cache_instance = ResponseCache(cache_dir=temp_cache_dir)
-            MockCache.return_value = cache_instance
-
-            tts = TTS(
-                openai_client=mock_openai_client,
-                provider='openai',
-                voice='nova',
-                speed=1.0,
-                enable_cache=True
-            )
-
-            # Warm cache
-            common_phrases = [
-                "Hardpoints deployed",
-                "Shields up",
-                "Setting speed to zero"
-            ]
-            tts.warm_cache(common_phrases)
+        # Warm cache
+        common_phrases = [
+            "Hardpoints deployed",
+            "Shields up",
+            "Setting speed to zero"
+        ]
+        tts.warm_cache(common_phrases)
 
-            # All phrases should be marked as frequent
-            for phrase in common_phrases:
-                assert cache_instance.hit_counts[phrase] >= 3
+        # All phrases should be marked as frequent
+        for phrase in common_phrases:
+            assert tts.cache.hit_counts[phrase] >= 3
 
-    def test_get_cache_stats(self, mock_openai_client, temp_cache_dir):
+    def test_get_cache_stats(self, tts):
         """Test retrieving cache stats through TTS"""
-        with patch('lib.ResponseCache.ResponseCache') as MockCache:
-            cache_instance = ResponseCache(cache_dir=temp_cache_dir)
-            MockCache.return_value = cache_instance
-
-            tts = TTS(
-                openai_client=mock_openai_client,
-                provider='openai',
-                voice='nova',
-                speed=1.0,
-                enable_cache=True
-            )
-
-            # Get stats
-            stats = tts.get_cache_stats()
+        # Get stats
+        stats = tts.get_cache_stats()
 
-            assert 'hits' in stats
-            assert 'misses' in stats
-            assert 'hit_rate_percent' in stats
+        assert 'hits' in stats
+        assert 'misses' in stats
+        assert 'hit_rate_percent' in stats
 
-    def test_cache_stats_when_disabled(self, mock_openai_client):
+    @pytest.mark.parametrize('tts', [False], indirect=True)
+    def test_cache_stats_when_disabled(self, tts):
         """Test cache stats when cache is disabled"""
-        tts = TTS(
-            openai_client=mock_openai_client,
-            provider='openai',
-            voice='nova',
-            speed=1.0,
-            enable_cache=False
-        )
-
         stats = tts.get_cache_stats()
         assert stats == {'enabled': False}
 
@@ -143,18 +128,9 @@ class TestTTSCacheIntegration:
 class TestTTSCachePerformance:
     """Performance tests for TTS cache"""
 
-    @pytest.fixture
-    def temp_cache_dir(self):
-        """Create temporary cache directory"""
-        temp_dir = tempfile.mkdtemp()
-        yield temp_dir
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
-    def test_cache_hit_faster_than_generation(self, temp_cache_dir):
+    def test_cache_hit_faster_than_generation(self, cache):
         """Test that cache hits are significantly faster than generation"""
         # This is a conceptual test - actual TTS generation is mocked
-        cache = ResponseCache(cache_dir=temp_cache_dir)
-
         text = "Hardpoints deployed"
         audio_data = b"A" * (50 * 1024)  # 50KB
 
@@ -162,29 +138,27 @@ class TestTTSCachePerformance:
         cache.hit_counts[text] = 10
 
         # Simulate first generation (miss)
-        start_miss = time.time()
+        start_miss = time.perf_counter_ns()
         time.sleep(0.3)  # Simulate 300ms TTS generation
         cache.cache_audio(text, "nova", 1.0, "openai", audio_data)
-        miss_time = time.time() - start_miss
+        miss_time = time.perf_counter_ns() - start_miss
 
         # Simulate cache hit
-        start_hit = time.time()
+        start_hit = time.perf_counter_ns()
         retrieved = cache.get_cached_audio(text, "nova", 1.0, "openai")
-        hit_time = time.time() - start_hit
+        hit_time = max(time.perf_counter_ns() - start_hit, 1)
 
         print(f"\nPerformance comparison:")
-        print(f"  Cache miss (generation): {miss_time*1000:.2f}ms")
-        print(f"  Cache hit (retrieval): {hit_time*1000:.2f}ms")
+        print(f"  Cache miss (generation): {miss_time/1e6:.2f}ms")
+        print(f"  Cache hit (retrieval): {hit_time/1e6:.2f}ms")
         print(f"  Speedup: {miss_time/hit_time:.1f}x faster")
 
         # Cache hit should be at least 10x faster
         assert hit_time < miss_time / 10
         assert retrieved == audio_data
 
-    def test_realistic_session_simulation(self, temp_cache_dir):
+    def test_realistic_session_simulation(self, cache):
         """Simulate a 2-hour gaming session with cache"""
-        cache = ResponseCache(cache_dir=temp_cache_dir)
-
         # Warm cache with common phrases
         common_phrases = [
             "Hardpoints deployed",
@@ -203,39 +177,27 @@ class TestTTSCachePerformance:
         cache.warm_cache([(p, "nova", 1.0, "openai") for p in common_phrases])
 
         # Simulate 100 AI responses (typical 2-hour session)
-        responses = []
-        for _ in range(100):
-            # 60% common phrases (cached)
-            if len(responses) % 5 < 3:
-                import random
-                phrase = random.choice(common_phrases)
-            else:
-                # 40% unique phrases (not cached)
-                phrase = f"Unique phrase {len(responses)}"
-
-            responses.append(phrase)
-
-        # Process all responses
-        total_time_without_cache = 0
-        total_time_with_cache = 0
+        # 60% common phrases (cached), 40% unique phrases (not cached)
+        choice = random.choice
+        responses = [
+            choice(common_phrases) if i % 5 < 3 else f"Unique phrase {i}"
+            for i in range(100)
+        ]
 
+        # Process all responses in order (a miss caches the phrase for later hits)
+        cache_hits = 0
         for phrase in responses:
             # Check cache
-            audio = cache.get_cached_audio(phrase, "nova", 1.0, "openai")
-
-            if audio is None:
-                # Cache miss - simulate generation
-                generation_time = 0.95  # 950ms
-                total_time_without_cache += generation_time
-                total_time_with_cache += generation_time
-
-                # Cache it
+            if cache.get_cached_audio(phrase, "nova", 1.0, "openai") is not None:
+                cache_hits += 1
+            else:
+                # Cache miss - cache the generated audio
                 fake_audio = f"audio_{phrase}".encode()
                 cache.cache_audio(phrase, "nova", 1.0, "openai", fake_audio)
-            else:
-                # Cache hit
-                total_time_without_cache += 0.95  # Would have taken 950ms
-                total_time_with_cache += 0.01  # But only takes 10ms
+
+        # Generation takes 950ms, a cache hit only 10ms
+        total_time_without_cache = 0.95 * len(responses)
+        total_time_with_cache = 0.01 * cache_hits + 0.95 * (len(responses) - cache_hits)
 
         stats = cache.get_stats()
 
@@ -256,17 +218,8 @@ class TestTTSCachePerformance:
 class TestTTSCacheEdgeCases:
     """Edge case tests for TTS cache"""
 
-    @pytest.fixture
-    def temp_cache_dir(self):
-        """Create temporary cache directory"""
-        temp_dir = tempfile.mkdtemp()
-        yield temp_dir
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
-    def test_empty_text(self, temp_cache_dir):
+    def test_empty_text(self, cache):
         """Test caching empty text"""
-        cache = ResponseCache(cache_dir=temp_cache_dir)
-
         # Empty text should not cause errors
         cache.cache_audio("", "nova", 1.0, "openai", b"empty_audio")
         retrieved = cache.get_cached_audio("", "nova", 1.0, "openai")
@@ -274,10 +227,8 @@ class TestTTSCacheEdgeCases:
         # May or may not be cached (depending on implementation)
         # Just verify no errors occur
 
-    def test_very_long_text(self, temp_cache_dir):
+    def test_very_long_text(self, cache):
         """Test caching very long text"""
-        cache = ResponseCache(cache_dir=temp_cache_dir)
-
         long_text = "A" * 500  # 500 characters
 
         # Should not cache (too long)
@@ -287,10 +238,8 @@ class TestTTSCacheEdgeCases:
         retrieved = cache.get_cached_audio(long_text, "nova", 1.0, "openai")
         assert retrieved is None
 
-    def test_special_characters_in_text(self, temp_cache_dir):
+    def test_special_characters_in_text(self, cache):
         """Test caching text with special characters"""
-        cache = ResponseCache(cache_dir=temp_cache_dir)
-
         special_texts = [
             "Hardpoints deployed!",
             "Speed: 50%",
@@ -299,16 +248,14 @@ class TestTTSCacheEdgeCases:
             "FSD charging... 5s",
         ]
 
-        for text in special_texts:
+        for text, audio_data in [(text, f"audio_{text}".encode()) for text in special_texts]:
             cache.hit_counts[text] = 5
-            cache.cache_audio(text, "nova", 1.0, "openai", f"audio_{text}".encode())
+            cache.cache_audio(text, "nova", 1.0, "openai", audio_data)
             retrieved = cache.get_cached_audio(text, "nova", 1.0, "openai")
-            assert retrieved == f"audio_{text}".encode()
+            assert retrieved == audio_data
 
-    def test_unicode_text(self, temp_cache_dir):
+    def test_unicode_text(self, cache):
         """Test caching text with unicode characters"""
-        cache = ResponseCache(cache_dir=temp_cache_dir)
-
         unicode_text = "Système: Colonia 🚀"
 
         cache.hit_counts[unicode_text] = 5
@@ -325,9 +272,8 @@ def run_benchmark():
     print("="*60)
 
     temp_dir = tempfile.mkdtemp()
+    cache = ResponseCache(cache_dir=temp_dir)
     try:
-        cache = ResponseCache(cache_dir=temp_dir)
-
         # Test 1: Cache retrieval speed
         print("\n[Test 1] Cache Retrieval Speed")
         print("-" * 60)
@@ -338,12 +284,12 @@ def run_benchmark():
         cache.cache_audio(text, "nova", 1.0, "openai", audio_data)
 
         iterations = 1000
-        start = time.time()
+        start = time.perf_counter_ns()
         for _ in range(iterations):
             cache.get_cached_audio(text, "nova", 1.0, "openai")
-        end = time.time()
+        elapsed_ns = time.perf_counter_ns() - start
 
-        avg_time = ((end - start) / iterations) * 1000
+        avg_time = elapsed_ns / iterations / 1e6
         print(f"Average retrieval time: {avg_time:.3f}ms")
         print(f"Target: <10ms")
         print(f"Result: {'✅ PASS' if avg_time < 10 else '❌ FAIL'}")
@@ -365,14 +311,23 @@ def run_benchmark():
         print("\n[Test 3] 2-Hour Session Simulation")
         print("-" * 60)
 
-        test = TestTTSCachePerformance()
-        test.test_realistic_session_simulation(temp_dir)
+        # Fresh cache, so the hits of Test 1 don't count towards the session
+        cache.close()
+        session_dir = tempfile.mkdtemp()
+        session_cache = ResponseCache(cache_dir=session_dir)
+        try:
+            test = TestTTSCachePerformance()
+            test.test_realistic_session_simulation(session_cache)
+        finally:
+            session_cache.close()
+            shutil.rmtree(session_dir, ignore_errors=True)
 
         print("\n" + "="*60)
         print("BENCHMARK COMPLETE")
         print("="*60)
 
     finally:
+        cache.close()
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 